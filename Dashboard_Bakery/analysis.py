@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+from resample import align_channels
+
+# Indoor channel and the room channel it is expected to follow
+CHANNEL_PAIRS = [
+    ("Temperature_Out", "Temperature_In"),
+    ("Humidity_Out", "Humidity_In"),
+]
+
+
+def _prepare(values):
+    """Return a float64 copy with the mean removed and gaps set to zero"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    centered = np.zeros_like(values)
+    if valid.any():
+        centered[valid] = values[valid] - values[valid].mean()
+    return centered
+
+
+def _fft_size(n):
+    # Next power of two that holds the full linear correlation
+    return 1 << int(2 * n - 1).bit_length()
+
+
+def cross_correlation(reference, follower, max_lag=None):
+    """Normalized cross-correlation of two equally sampled series via FFT.
+
+    Returns ``(lags, corr)`` where a positive lag means ``follower``
+    trails ``reference`` by that many samples. ``corr`` is all NaN when
+    either series is constant, since the correlation is undefined.
+    """
+    x = _prepare(reference)
+    y = _prepare(follower)
+    if len(x) != len(y):
+        raise ValueError("Series must have the same length")
+
+    n = len(x)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    if max_lag is None:
+        max_lag = n - 1
+    max_lag = min(int(max_lag), n - 1)
+
+    size = _fft_size(n)
+    spectrum = np.fft.rfft(y, size) * np.conj(np.fft.rfft(x, size))
+    full = np.fft.irfft(spectrum, size)
+
+    # Positive lags sit at the start of the circular result, negative at the end
+    corr = np.concatenate((full[size - max_lag :], full[: max_lag + 1]))
+    norm = np.sqrt(np.dot(x, x) * np.dot(y, y))
+    if norm > 0:
+        corr /= norm
+    else:
+        corr[:] = np.nan
+
+    lags = np.arange(-max_lag, max_lag + 1)
+    return lags, corr
+
+
+def estimate_lag(reference, follower, max_lag=None):
+    """Return ``(lag, peak_correlation)`` for the strongest positive match.
+
+    The lag is ``None`` (and the correlation NaN) when there is no data or
+    either series is constant.
+    """
+    lags, corr = cross_correlation(reference, follower, max_lag)
+    if len(corr) == 0 or np.isnan(corr).all():
+        return None, float("nan")
+    best = int(np.argmax(corr))
+    return int(lags[best]), float(corr[best])
+
+
+def windowed_cross_correlation(reference, follower, window, step=None, max_lag=None):
+    """Cross-correlation over sliding windows, computed as one batched FFT.
+
+    Returns ``(starts, lags, corr)`` with ``corr`` shaped
+    ``(len(starts), len(lags))``, ready to be drawn as a heatmap.
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    follower = np.asarray(follower, dtype=np.float64)
+    if len(reference) != len(follower):
+        raise ValueError("Series must have the same length")
+
+    window = int(window)
+    step = int(step or max(1, window // 2))
+    if max_lag is None:
+        max_lag = window // 4
+    max_lag = min(int(max_lag), window - 1)
+    lags = np.arange(-max_lag, max_lag + 1)
+
+    if window < 2 or len(reference) < window:
+        return np.zeros(0, dtype=np.int64), lags, np.zeros((0, len(lags)))
+
+    views = np.lib.stride_tricks.sliding_window_view
+    x = views(reference, window)[::step]
+    y = views(follower, window)[::step]
+    starts = np.arange(0, len(reference) - window + 1, step)
+
+    # Center each window independently, treating gaps as zero deviation
+    x = np.where(np.isfinite(x), x, np.nan)
+    y = np.where(np.isfinite(y), y, np.nan)
+    x = np.nan_to_num(x - np.nanmean(x, axis=1, keepdims=True))
+    y = np.nan_to_num(y - np.nanmean(y, axis=1, keepdims=True))
+
+    size = _fft_size(window)
+    spectrum = np.fft.rfft(y, size, axis=1) * np.conj(np.fft.rfft(x, size, axis=1))
+    full = np.fft.irfft(spectrum, size, axis=1)
+    corr = np.concatenate((full[:, size - max_lag :], full[:, : max_lag + 1]), axis=1)
+
+    norm = np.sqrt(np.einsum("ij,ij->i", x, x) * np.einsum("ij,ij->i", y, y))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.where(norm[:, None] > 0, corr / norm[:, None], np.nan)
+
+    return starts, lags, corr
+
+
+def sample_period(df):
+    """Median spacing of the ``timestamp`` column as a Timedelta"""
+    if "timestamp" not in df or len(df) < 2:
+        return pd.Timedelta(0)
+    deltas = np.diff(df["timestamp"].to_numpy().astype("datetime64[ns]"))
+    return pd.Timedelta(np.median(deltas.astype(np.int64)), unit="ns")
+
+
+def regular_history(df, columns=None, period=None, limit=5, max_growth=10):
+    """Channels of a history frame on a regular grid of ``period``.
+
+    Lags are counted in samples, so rows missing from a log (an outage in
+    a capture, a dropped frame) would shift every later sample. The grid
+    defaults to the median spacing and the channels of ``CHANNEL_PAIRS``.
+    Gaps of up to ``limit`` bins are interpolated, as empty bins shared by
+    both channels would otherwise correlate at lag 0; longer outages stay
+    NaN. A grid over ``max_growth`` times the rows (logs months apart)
+    would be mostly empty, so such a frame is returned as it is.
+    """
+    if columns is None:
+        columns = sorted({name for pair in CHANNEL_PAIRS for name in pair})
+    period = sample_period(df) if period is None else period
+    span = df["timestamp"].max() - df["timestamp"].min() if len(df) else None
+    if period <= pd.Timedelta(0) or span / period + 1 > max_growth * len(df):
+        return df[["timestamp"] + list(columns)]
+    times = df["timestamp"].to_numpy()
+    aligned = align_channels(
+        {name: (times, df[name].to_numpy()) for name in columns},
+        period.to_pytimedelta(),
+        fill="linear",
+        limit=limit,
+    )
+    return pd.DataFrame(
+        {
+            "timestamp": aligned["timestamps"],
+            **{name: aligned[name] for name in columns},
+        }
+    )
+
+
+def format_lag(lag):
+    """Signed duration text for a lag, e.g. ``-39 min`` or ``1 h 5 min``"""
+    if pd.isna(lag):
+        return ""
+    seconds = lag.total_seconds()
+    sign = "-" if seconds < 0 else ""
+    minutes, seconds = divmod(round(abs(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    parts = [
+        f"{value} {unit}"
+        for value, unit in ((hours, "h"), (minutes, "min"), (seconds, "s"))
+        if value
+    ]
+    return sign + (" ".join(parts) or "0 s")
+
+
+def lag_report(df, pairs=CHANNEL_PAIRS, max_lag=None):
+    """Lag and correlation of each indoor channel behind its room channel"""
+    period = sample_period(df)
+    rows = []
+    for reference, follower in pairs:
+        lag, peak = estimate_lag(df[reference], df[follower], max_lag)
+        rows.append(
+            {
+                "Reference": reference,
+                "Follower": follower,
+                "Lag (samples)": lag,
+                "Lag": pd.NaT if lag is None else lag * period,
+                "Peak correlation": peak,
+            }
+        )
+    # Nullable integers, so an undefined lag does not turn the column to floats
+    return pd.DataFrame(rows).astype({"Lag (samples)": "Int64"})
@@ -1,10 +1,32 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime, timedelta
-import re
-import io
+import html
+import os
+import time
+
+from analysis import (
+    CHANNEL_PAIRS,
+    format_lag,
+    lag_report,
+    regular_history,
+    windowed_cross_correlation,
+)
+from export import (
+    EXPORT_FORMATS,
+    STATIC_FILE_LIMIT,
+    export_history,
+    export_path,
+    static_url,
+    unused_path,
+)
+from figure_cache import FigureCache, data_version
+from history_chart import history_figure
+from ingest import FolderIngestor
+from loaders import MEASUREMENT_COLUMNS
+from merge import parse_uploads
+from raw_table import PAGE_SIZES, page_slice, range_mask
+from tail import LogTail
 
 # Set page config
 st.set_page_config(
@@ -32,284 +54,380 @@ st.markdown(
 )
 
 
-def process_environmental_data(text):
-    # Initialize lists to store the data
-    measurements = []
-
-    # Regular expressions for all measurements in one group
-    pattern = (
-        r"Humidity out: (\d+\.\d+) %\s*"
-        r"Temperature out: (\d+\.\d+) \*C\s*"
-        r"Humidity IN: (\d+\.\d+) %\s*"
-        r"Temperature IN: (\d+\.\d+) \*C\s*"
-        r"CO2: (\d+\.\d+)\s+ppm"
-    )
-
-    # Find all matches
-    matches = re.finditer(pattern, text)
-
-    # Process each complete set of measurements
-    for match in matches:
-        measurements.append(
-            {
-                "Humidity_Out": float(match.group(1)),
-                "Temperature_Out": float(match.group(2)),
-                "Humidity_In": float(match.group(3)),
-                "Temperature_In": float(match.group(4)),
-                "CO2": float(match.group(5)),
-            }
-        )
-
-    # Create DataFrame from the list of dictionaries
-    df = pd.DataFrame(measurements)
+# Exports land in the folder Streamlit serves as app/static/ (see
+# .streamlit/config.toml), so finished files download without passing through
+# the script
+APP_STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DEFAULT_EXPORT_DIR = os.path.join(APP_STATIC_DIR, "exports")
 
-    # Add timestamp column with 1-second intervals
-    base_time = datetime.now() - timedelta(minutes=len(df))
-    df["timestamp"] = [base_time + timedelta(minutes=x) for x in range(len(df))]
 
-    return df
+@st.cache_data(max_entries=4)
+def load_uploads(files):
+    # The chart's data version is worked out once per upload, not on every rerun
+    df = parse_uploads(files)
+    return df, data_version(df)
 
 
-def read_file_with_encoding(file_content):
-    # Try different encodings
-    encodings = ["utf-8", "latin-1", "cp1252"]
+@st.cache_resource
+def figure_cache():
+    # One cache per server process, so sessions viewing the same data share it
+    return FigureCache()
 
-    for encoding in encodings:
-        try:
-            return file_content.decode(encoding)
-        except UnicodeDecodeError:
-            continue
 
-    raise UnicodeDecodeError("Failed to decode file with any encoding")
+def metric_delta(df, column, unit, digits=1):
+    # A single reading has nothing to compare against yet
+    if len(df) < 2:
+        return None
+    return f"{df[column].iloc[-1] - df[column].iloc[-2]:.{digits}f}{unit}"
 
 
 # Title
 st.title("🌡️ Environmental Monitoring Dashboard")
 
-# File uploader
-uploaded_file = st.file_uploader("Upload sensor data file", type=["txt"])
-
-if uploaded_file is not None:
+# Data source: one-shot upload, a local log that keeps growing or a log folder
+source_mode = st.radio(
+    "Data source", ["Upload file", "Follow log file", "Watch folder"], horizontal=True
+)
+uploaded_files = []
+log_tail = None
+ingestor = None
+
+if source_mode == "Upload file":
+    uploaded_files = st.file_uploader(
+        "Upload sensor data files",
+        type=["txt", "parquet"],
+        accept_multiple_files=True,
+    )
+elif source_mode == "Watch folder":
+    ingest_dir = st.text_input("Log folder", os.environ.get("INGEST_DIR", ""))
+    if ingest_dir:
+        ingestors = st.session_state.setdefault("ingestors", {})
+        if ingest_dir not in ingestors:
+            ingestors[ingest_dir] = FolderIngestor(ingest_dir)
+        ingestor = ingestors[ingest_dir]
+else:
+    log_path = st.text_input("Log file path", os.environ.get("TAIL_LOG", ""))
+    auto_refresh = st.checkbox("Auto refresh every 5 seconds")
+    if log_path:
+        # One tail per path and session, so reruns only parse appended bytes
+        log_tails = st.session_state.setdefault("log_tails", {})
+        if log_path not in log_tails:
+            log_tails[log_path] = LogTail(log_path)
+        log_tail = log_tails[log_path]
+
+if uploaded_files or log_tail is not None or ingestor is not None:
     try:
-        # Read the file content with different encodings
-        file_content = uploaded_file.read()
-        data_text = read_file_with_encoding(file_content)
-
-        # Process the data
-        df = process_environmental_data(data_text)
-
-        # Create three columns for statistics
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            st.markdown("### Temperature Statistics")
-            temp_stats = pd.DataFrame(
-                {
-                    "Indoor": [
-                        df["Temperature_In"].min(),
-                        df["Temperature_In"].mean(),
-                        df["Temperature_In"].max(),
-                    ],
-                    "Outdoor": [
-                        df["Temperature_Out"].min(),
-                        df["Temperature_Out"].mean(),
-                        df["Temperature_Out"].max(),
-                    ],
-                },
-                index=["Min", "Average", "Max"],
-            ).round(2)
-            st.dataframe(temp_stats, use_container_width=True)
-
-        with col2:
-            st.markdown("### Humidity Statistics")
-            humid_stats = pd.DataFrame(
-                {
-                    "Indoor": [
-                        df["Humidity_In"].min(),
-                        df["Humidity_In"].mean(),
-                        df["Humidity_In"].max(),
-                    ],
-                    "Outdoor": [
-                        df["Humidity_Out"].min(),
-                        df["Humidity_Out"].mean(),
-                        df["Humidity_Out"].max(),
-                    ],
-                },
-                index=["Min", "Average", "Max"],
-            ).round(2)
-            st.dataframe(humid_stats, use_container_width=True)
-
-        with col3:
-            st.markdown("### CO2 Statistics")
-            co2_stats = pd.DataFrame(
-                {"CO2 (ppm)": [df["CO2"].min(), df["CO2"].mean(), df["CO2"].max()]},
-                index=["Min", "Average", "Max"],
-            ).round(2)
-            st.dataframe(co2_stats, use_container_width=True)
-
-        # Create metrics
-        col1, col2, col3, col4, col5 = st.columns(5)
-
-        with col1:
-            st.metric(
-                "Indoor Temperature",
-                f"{df['Temperature_In'].iloc[-1]:.1f}°C",
-                f"{df['Temperature_In'].iloc[-1] - df['Temperature_In'].iloc[-2]:.1f}°C",
+        if ingestor is not None:
+            updated = ingestor.run_once()
+            df = ingestor.dataset()
+            # The manifest pins down every cached file the dataset is read from
+            version = ("folder", ingestor.directory) + tuple(
+                (path, entry["offset"], entry["mtime"])
+                for path, entry in sorted(ingestor.manifest.items())
             )
-        with col2:
-            st.metric(
-                "Indoor Humidity",
-                f"{df['Humidity_In'].iloc[-1]:.1f}%",
-                f"{df['Humidity_In'].iloc[-1] - df['Humidity_In'].iloc[-2]:.1f}%",
+            st.caption(
+                f"{len(ingestor.manifest)} files in {ingestor.directory}, "
+                f"{len(updated)} parsed on this refresh"
             )
-        with col3:
-            st.metric(
-                "Outdoor Temperature",
-                f"{df['Temperature_Out'].iloc[-1]:.1f}°C",
-                f"{df['Temperature_Out'].iloc[-1] - df['Temperature_Out'].iloc[-2]:.1f}°C",
+        elif log_tail is not None:
+            new_rows = log_tail.refresh()
+            df = log_tail.frame
+            # Tail timestamps are anchored at this session's reads, hence the end points
+            version = (
+                "tail",
+                log_tail.path,
+                log_tail.inode,
+                log_tail.offset,
+                tuple(df["timestamp"].iloc[[0, -1]]) if len(df) else (),
             )
-        with col4:
-            st.metric(
-                "Outdoor Humidity",
-                f"{df['Humidity_Out'].iloc[-1]:.1f}%",
-                f"{df['Humidity_Out'].iloc[-1] - df['Humidity_Out'].iloc[-2]:.1f}%",
+            st.caption(
+                f"Following {log_tail.path}: {new_rows} new rows, "
+                f"{log_tail.rows} total, {log_tail.offset} bytes read"
             )
-        with col5:
-            st.metric(
-                "CO2 Level",
-                f"{df['CO2'].iloc[-1]:.0f} ppm",
-                f"{df['CO2'].iloc[-1] - df['CO2'].iloc[-2]:.0f} ppm",
+        else:
+            # Parse uploads in parallel and k-way merge them into one timeline
+            df, version = load_uploads(
+                tuple((f.name, f.getvalue()) for f in uploaded_files)
             )
 
-        # Update the layout and chart configuration in the plotting section
-
-        # Create main chart
-        fig = make_subplots(
-            rows=2,
-            cols=1,
-            shared_xaxes=True,
-            vertical_spacing=0.08,
-            subplot_titles=(
-                "<span style='color: white'>Temperature & Humidity</span>",
-                "<span style='color: white'>CO2 Levels</span>",
-            ),
-        )
-
-        # Temperature and Humidity plot
-        fig.add_trace(
-            go.Scatter(
-                x=df["timestamp"],
-                y=df["Temperature_In"],
-                name="Indoor Temp",
-                line=dict(color="#FF9900", width=2),
-            ),
-            row=1,
-            col=1,
-        )
-        fig.add_trace(
-            go.Scatter(
-                x=df["timestamp"],
-                y=df["Temperature_Out"],
-                name="Outdoor Temp",
-                line=dict(color="#FF99FF", width=2),
-            ),
-            row=1,
-            col=1,
-        )
-        fig.add_trace(
-            go.Scatter(
-                x=df["timestamp"],
-                y=df["Humidity_In"],
-                name="Indoor Humidity",
-                line=dict(color="#0099FF", width=2),
-            ),
-            row=1,
-            col=1,
-        )
-        fig.add_trace(
-            go.Scatter(
-                x=df["timestamp"],
-                y=df["Humidity_Out"],
-                name="Outdoor Humidity",
-                line=dict(color="#00FFFF", width=2),
-            ),
-            row=1,
-            col=1,
-        )
-
-        # CO2 plot
-        fig.add_trace(
-            go.Scatter(
-                x=df["timestamp"],
-                y=df["CO2"],
-                name="CO2",
-                line=dict(color="#FF0000", width=2),
-            ),
-            row=2,
-            col=1,
-        )
-
-        # Update layout for dark theme
-        fig.update_layout(
-            height=800,
-            showlegend=True,
-            plot_bgcolor="rgba(26,28,36,0.8)",
-            paper_bgcolor="rgba(26,28,36,0.8)",
-            legend=dict(
-                yanchor="top",
-                y=1.2,
-                xanchor="left",
-                x=0.01,
-                orientation="h",
-                font=dict(color="white"),
-            ),
-            font=dict(color="white"),
-        )
-
-        # Update axes for dark theme
-        fig.update_xaxes(
-            showgrid=True,
-            gridwidth=1,
-            gridcolor="rgba(128,128,128,0.2)",
-            linecolor="rgba(128,128,128,0.2)",
-            tickfont=dict(color="white"),
-        )
-        fig.update_yaxes(
-            showgrid=True,
-            gridwidth=1,
-            gridcolor="rgba(128,128,128,0.2)",
-            linecolor="rgba(128,128,128,0.2)",
-            tickfont=dict(color="white"),
-            title_font=dict(color="white"),
-        )
-
-        # Add y-axis titles
-        fig.update_yaxes(title_text="Temperature (°C) / Humidity (%)", row=1, col=1)
-        fig.update_yaxes(title_text="CO2 (ppm)", row=2, col=1)
-
-        # Update hover template
-        fig.update_traces(
-            hovertemplate="<b>%{y:.1f}</b><br>%{x}<extra></extra>",
-            hoverlabel=dict(
-                bgcolor="rgba(26,28,36,0.8)",
-                font_color="white",
-                font_size=12,
-                bordercolor="white",
-            ),
-        )
-        # Show plot
-        st.plotly_chart(fig, use_container_width=True)
-
-        # Add CO2 threshold warning
-        if df["CO2"].iloc[-1] > 1000:
-            st.warning(
-                f"⚠️ CO2 levels are above 1000 ppm (Current: {df['CO2'].iloc[-1]:.0f} ppm)"
+        if "source" in df and df["source"].nunique() > 1:
+            sources = sorted(df["source"].unique())
+            selected_sources = st.multiselect("Sources", sources, default=sources)
+            df = df[df["source"].isin(selected_sources)].reset_index(drop=True)
+            version = (version, tuple(selected_sources))
+
+        if df.empty:
+            # A new or still empty log: nothing to show until readings arrive
+            if uploaded_files:
+                st.warning("No readings found in the uploaded files")
+            else:
+                st.info("Waiting for data: no complete readings yet")
+        else:
+            # Create three columns for statistics
+            col1, col2, col3 = st.columns(3)
+
+            with col1:
+                st.markdown("### Temperature Statistics")
+                temp_stats = pd.DataFrame(
+                    {
+                        "Indoor": [
+                            df["Temperature_In"].min(),
+                            df["Temperature_In"].mean(),
+                            df["Temperature_In"].max(),
+                        ],
+                        "Outdoor": [
+                            df["Temperature_Out"].min(),
+                            df["Temperature_Out"].mean(),
+                            df["Temperature_Out"].max(),
+                        ],
+                    },
+                    index=["Min", "Average", "Max"],
+                ).round(2)
+                st.dataframe(temp_stats, use_container_width=True)
+
+            with col2:
+                st.markdown("### Humidity Statistics")
+                humid_stats = pd.DataFrame(
+                    {
+                        "Indoor": [
+                            df["Humidity_In"].min(),
+                            df["Humidity_In"].mean(),
+                            df["Humidity_In"].max(),
+                        ],
+                        "Outdoor": [
+                            df["Humidity_Out"].min(),
+                            df["Humidity_Out"].mean(),
+                            df["Humidity_Out"].max(),
+                        ],
+                    },
+                    index=["Min", "Average", "Max"],
+                ).round(2)
+                st.dataframe(humid_stats, use_container_width=True)
+
+            with col3:
+                st.markdown("### CO2 Statistics")
+                co2_stats = pd.DataFrame(
+                    {"CO2 (ppm)": [df["CO2"].min(), df["CO2"].mean(), df["CO2"].max()]},
+                    index=["Min", "Average", "Max"],
+                ).round(2)
+                st.dataframe(co2_stats, use_container_width=True)
+
+            # Create metrics
+            col1, col2, col3, col4, col5 = st.columns(5)
+
+            with col1:
+                st.metric(
+                    "Indoor Temperature",
+                    f"{df['Temperature_In'].iloc[-1]:.1f}°C",
+                    metric_delta(df, "Temperature_In", "°C"),
+                )
+            with col2:
+                st.metric(
+                    "Indoor Humidity",
+                    f"{df['Humidity_In'].iloc[-1]:.1f}%",
+                    metric_delta(df, "Humidity_In", "%"),
+                )
+            with col3:
+                st.metric(
+                    "Outdoor Temperature",
+                    f"{df['Temperature_Out'].iloc[-1]:.1f}°C",
+                    metric_delta(df, "Temperature_Out", "°C"),
+                )
+            with col4:
+                st.metric(
+                    "Outdoor Humidity",
+                    f"{df['Humidity_Out'].iloc[-1]:.1f}%",
+                    metric_delta(df, "Humidity_Out", "%"),
+                )
+            with col5:
+                st.metric(
+                    "CO2 Level",
+                    f"{df['CO2'].iloc[-1]:.0f} ppm",
+                    metric_delta(df, "CO2", " ppm", 0),
+                )
+
+            # Main chart over a chosen range; built figures are shared by every viewer
+            chart_df = df
+            chart_start = chart_end = None
+            first_time = df["timestamp"].min().to_pydatetime()
+            last_time = df["timestamp"].max().to_pydatetime()
+            if first_time < last_time:
+                chart_start, chart_end = st.slider(
+                    "Chart range",
+                    first_time,
+                    last_time,
+                    (first_time, last_time),
+                    format="YYYY-MM-DD HH:mm",
+                )
+                chart_df = df[df["timestamp"].between(chart_start, chart_end)]
+            fig = figure_cache().get_or_build(
+                (version, chart_start, chart_end, "dark"),
+                lambda: history_figure(chart_df),
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+            # Add CO2 threshold warning
+            if df["CO2"].iloc[-1] > 1000:
+                st.warning(
+                    f"⚠️ CO2 levels are above 1000 ppm (Current: {df['CO2'].iloc[-1]:.0f} ppm)"
+                )
+
+            # Indoor/outdoor lag analysis
+            st.subheader("🔁 Indoor / Outdoor Lag")
+            # On a regular grid, so a gap in the log does not shift the lags
+            lag_df = regular_history(df)
+            report = lag_report(lag_df)
+            report["Lag"] = report["Lag"].map(format_lag)
+            st.dataframe(report.round(3), use_container_width=True)
+
+            if len(lag_df) >= 16:
+                pair_labels = [f"{ref} → {fol}" for ref, fol in CHANNEL_PAIRS]
+                lag_col1, lag_col2 = st.columns(2)
+                with lag_col1:
+                    pair_index = st.selectbox(
+                        "Channel pair",
+                        range(len(pair_labels)),
+                        format_func=lambda i: pair_labels[i],
+                    )
+                with lag_col2:
+                    if len(lag_df) // 2 > 16:
+                        window = st.slider(
+                            "Window (samples)",
+                            min_value=16,
+                            max_value=len(lag_df) // 2,
+                            value=max(16, min(240, len(lag_df) // 8)),
+                        )
+                    else:
+                        # A slider needs max > min; short files get the smallest window
+                        window = 16
+                        st.caption("Window: 16 samples (too few rows to vary it)")
+                reference, follower = CHANNEL_PAIRS[pair_index]
+                starts, lags, corr = windowed_cross_correlation(
+                    lag_df[reference], lag_df[follower], window
+                )
+                if len(starts):
+                    lag_fig = go.Figure(
+                        go.Heatmap(
+                            x=lag_df["timestamp"].iloc[starts],
+                            y=lags,
+                            z=corr.T,
+                            zmin=-1,
+                            zmax=1,
+                            colorscale="RdBu_r",
+                            colorbar=dict(title="Correlation"),
+                        )
+                    )
+                    lag_fig.update_layout(
+                        height=400,
+                        plot_bgcolor="rgba(26,28,36,0.8)",
+                        paper_bgcolor="rgba(26,28,36,0.8)",
+                        font=dict(color="white"),
+                        yaxis_title="Lag (samples)",
+                    )
+                    st.plotly_chart(lag_fig, use_container_width=True)
+
+            # Show data table
+            st.subheader("📊 Raw Data")
+            value_columns = [c for c in df.columns if c not in ("timestamp", "source")]
+            table_col1, table_col2, table_col3, table_col4 = st.columns(4)
+            with table_col1:
+                sort_by = st.selectbox("Sort by", ["(file order)"] + value_columns)
+            with table_col2:
+                descending = st.checkbox("Descending")
+            with table_col3:
+                filter_column = st.selectbox("Filter", ["(none)"] + value_columns)
+            with table_col4:
+                page_size = st.selectbox("Rows per page", PAGE_SIZES, index=2)
+
+            mask = None
+            if filter_column != "(none)" and len(df):
+                low = float(df[filter_column].min())
+                high = float(df[filter_column].max())
+                if low < high:
+                    low, high = st.slider(
+                        f"{filter_column} range", low, high, (low, high)
+                    )
+                    mask = range_mask(df, filter_column, low, high)
+
+            page = st.number_input("Page", min_value=1, value=1, step=1)
+            page_df, matching, page_count = page_slice(
+                df,
+                page,
+                page_size,
+                sort_by=None if sort_by == "(file order)" else sort_by,
+                ascending=not descending,
+                mask=mask,
+            )
+            # Only the visible slice is rounded and sent to the browser
+            display_df = page_df.drop("timestamp", axis=1).round(2)
+            st.dataframe(display_df, use_container_width=True)
+            st.caption(
+                f"Page {min(page, page_count)} of {page_count} · "
+                f"{matching} matching rows of {len(df)}"
             )
 
-        # Show data table
-        st.subheader("📊 Raw Data")
-        display_df = df.drop("timestamp", axis=1).round(2)
-        st.dataframe(display_df)
+            # Chunked export of a time range and set of channels
+            with st.expander("⬇️ Export history"):
+                export_columns = st.multiselect(
+                    "Channels", MEASUREMENT_COLUMNS, default=MEASUREMENT_COLUMNS
+                )
+                first_time = df["timestamp"].min().to_pydatetime()
+                last_time = df["timestamp"].max().to_pydatetime()
+                if first_time < last_time:
+                    export_start, export_end = st.slider(
+                        "Time range",
+                        first_time,
+                        last_time,
+                        (first_time, last_time),
+                        format="YYYY-MM-DD HH:mm",
+                    )
+                else:
+                    export_start, export_end = first_time, last_time
+                export_format = st.radio("Format", EXPORT_FORMATS, horizontal=True)
+                export_dir = os.environ.get("EXPORT_DIR", DEFAULT_EXPORT_DIR)
+                export_name = st.text_input(
+                    "File name", f"history_{export_start:%Y%m%d_%H%M}.{export_format}"
+                )
+                if st.button("Export"):
+                    os.makedirs(export_dir, exist_ok=True)
+                    destination = export_path(export_dir, export_name)
+                    if destination is None:
+                        st.error(
+                            f"'{export_name}' is not a file name inside {export_dir}"
+                        )
+                    elif not df["timestamp"].between(export_start, export_end).any():
+                        st.warning("No rows in the selected range, nothing exported")
+                    else:
+                        # Never replaces an earlier export: a taken name gets .partN
+                        destination = unused_path(destination)
+                        # Written to disk chunk by chunk instead of built in the rerun
+                        rows = export_history(
+                            df,
+                            destination,
+                            export_format,
+                            export_start,
+                            export_end,
+                            export_columns,
+                        )
+                        st.success(f"Exported {rows} rows to {destination}")
+                        # Served by Streamlit straight from disk, never read into the app
+                        url = static_url(destination, APP_STATIC_DIR)
+                        if (
+                            url is not None
+                            and st.get_option("server.enableStaticServing")
+                            and os.path.getsize(destination) <= STATIC_FILE_LIMIT
+                        ):
+                            file_name = html.escape(os.path.basename(destination))
+                            st.markdown(
+                                f'<a href="{url}" download="{file_name}">'
+                                f"⬇️ Download {file_name}</a>",
+                                unsafe_allow_html=True,
+                            )
+                        else:
+                            st.caption(
+                                "Export into the app's static folder with "
+                                "server.enableStaticServing on to download it here"
+                            )
 
     except Exception as e:
         st.error(f"Error processing the file: {str(e)}")
@@ -317,3 +435,7 @@ if uploaded_file is not None:
 
 else:
     st.info("Please upload a sensor data file to begin visualization")
+
+if log_tail is not None and auto_refresh:
+    time.sleep(5)
+    st.rerun()
@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime, timedelta
-import re
+from datetime import timedelta
 import io
 
+from figure_cache import FigureCache, data_version
+from history_chart import history_figure
+from loaders import (
+    process_environmental_data,
+    read_file_with_encoding,
+    read_parquet_history,
+)
+
 # Set page config
 st.set_page_config(
     page_title="Environmental Monitoring Dashboard", page_icon="🌡️", layout="wide"
@@ -32,71 +37,35 @@ st.markdown(
 )
 
 
-def process_environmental_data(text):
-    # Initialize lists to store the data
-    measurements = []
-
-    # Regular expressions for all measurements in one group
-    pattern = (
-        r"Humidity out: (\d+\.\d+) %\s*"
-        r"Temperature out: (\d+\.\d+) \*C\s*"
-        r"Humidity IN: (\d+\.\d+) %\s*"
-        r"Temperature IN: (\d+\.\d+) \*C\s*"
-        r"CO2: (\d+\.\d+)\s+ppm"
-    )
-
-    # Find all matches
-    matches = re.finditer(pattern, text)
-
-    # Process each complete set of measurements
-    for match in matches:
-        measurements.append(
-            {
-                "Humidity_Out": float(match.group(1)),
-                "Temperature_Out": float(match.group(2)),
-                "Humidity_In": float(match.group(3)),
-                "Temperature_In": float(match.group(4)),
-                "CO2": float(match.group(5)),
-            }
+@st.cache_data(max_entries=4)
+def load_upload(name, content):
+    # Parsed once per upload; text logs are anchored at parse time, so a
+    # reparse on every rerun would also give the chart a new data version
+    if name.endswith(".parquet"):
+        # Columnar history already carries typed columns and timestamps
+        df = read_parquet_history(io.BytesIO(content))
+    else:
+        df = process_environmental_data(
+            read_file_with_encoding(content), interval=timedelta(hours=1)
         )
+    return df, data_version(df)
 
-    # Create DataFrame from the list of dictionaries
-    df = pd.DataFrame(measurements)
-
-    # Add timestamp column (simulated)
-    base_time = datetime.now() - timedelta(hours=len(df))
-    df["timestamp"] = [base_time + timedelta(hours=x) for x in range(len(df))]
-
-    return df
 
-
-def read_file_with_encoding(file_content):
-    # Try different encodings
-    encodings = ["utf-8", "latin-1", "cp1252"]
-
-    for encoding in encodings:
-        try:
-            return file_content.decode(encoding)
-        except UnicodeDecodeError:
-            continue
-
-    raise UnicodeDecodeError("Failed to decode file with any encoding")
+@st.cache_resource
+def figure_cache():
+    # One cache per server process, so sessions viewing the same data share it
+    return FigureCache()
 
 
 # Title
 st.title("🌡️ Environmental Monitoring Dashboard")
 
 # File uploader
-uploaded_file = st.file_uploader("Upload sensor data file", type=["txt"])
+uploaded_file = st.file_uploader("Upload sensor data file", type=["txt", "parquet"])
 
 if uploaded_file is not None:
     try:
-        # Read the file content with different encodings
-        file_content = uploaded_file.read()
-        data_text = read_file_with_encoding(file_content)
-
-        # Process the data
-        df = process_environmental_data(data_text)
+        df, version = load_upload(uploaded_file.name, uploaded_file.getvalue())
 
         # Create three columns for statistics
         col1, col2, col3 = st.columns(3)
@@ -181,123 +150,10 @@ if uploaded_file is not None:
                 f"{df['CO2'].iloc[-1] - df['CO2'].iloc[-2]:.0f} ppm",
             )
 
-        # Update the layout and chart configuration in the plotting section
-
-        # Create main chart
-        fig = make_subplots(
-            rows=2,
-            cols=1,
-            shared_xaxes=True,
-            vertical_spacing=0.08,
-            subplot_titles=(
-                "<span style='color: white'>Temperature & Humidity</span>",
-                "<span style='color: white'>CO2 Levels</span>",
-            ),
-        )
-
-        # Temperature and Humidity plot
-        fig.add_trace(
-            go.Scatter(
-                x=df["timestamp"],
-                y=df["Temperature_In"],
-                name="Indoor Temp",
-                line=dict(color="#FF9900", width=2),
-            ),
-            row=1,
-            col=1,
-        )
-        fig.add_trace(
-            go.Scatter(
-                x=df["timestamp"],
-                y=df["Temperature_Out"],
-                name="Outdoor Temp",
-                line=dict(color="#FF99FF", width=2),
-            ),
-            row=1,
-            col=1,
-        )
-        fig.add_trace(
-            go.Scatter(
-                x=df["timestamp"],
-                y=df["Humidity_In"],
-                name="Indoor Humidity",
-                line=dict(color="#0099FF", width=2),
-            ),
-            row=1,
-            col=1,
-        )
-        fig.add_trace(
-            go.Scatter(
-                x=df["timestamp"],
-                y=df["Humidity_Out"],
-                name="Outdoor Humidity",
-                line=dict(color="#00FFFF", width=2),
-            ),
-            row=1,
-            col=1,
-        )
-
-        # CO2 plot
-        fig.add_trace(
-            go.Scatter(
-                x=df["timestamp"],
-                y=df["CO2"],
-                name="CO2",
-                line=dict(color="#FF0000", width=2),
-            ),
-            row=2,
-            col=1,
-        )
-
-        # Update layout for dark theme
-        fig.update_layout(
-            height=800,
-            showlegend=True,
-            plot_bgcolor="rgba(26,28,36,0.8)",
-            paper_bgcolor="rgba(26,28,36,0.8)",
-            legend=dict(
-                yanchor="top",
-                y=1.2,
-                xanchor="left",
-                x=0.01,
-                orientation="h",
-                font=dict(color="white"),
-            ),
-            font=dict(color="white"),
-        )
-
-        # Update axes for dark theme
-        fig.update_xaxes(
-            showgrid=True,
-            gridwidth=1,
-            gridcolor="rgba(128,128,128,0.2)",
-            linecolor="rgba(128,128,128,0.2)",
-            tickfont=dict(color="white"),
-        )
-        fig.update_yaxes(
-            showgrid=True,
-            gridwidth=1,
-            gridcolor="rgba(128,128,128,0.2)",
-            linecolor="rgba(128,128,128,0.2)",
-            tickfont=dict(color="white"),
-            title_font=dict(color="white"),
-        )
-
-        # Add y-axis titles
-        fig.update_yaxes(title_text="Temperature (°C) / Humidity (%)", row=1, col=1)
-        fig.update_yaxes(title_text="CO2 (ppm)", row=2, col=1)
-
-        # Update hover template
-        fig.update_traces(
-            hovertemplate="<b>%{y:.1f}</b><br>%{x}<extra></extra>",
-            hoverlabel=dict(
-                bgcolor="rgba(26,28,36,0.8)",
-                font_color="white",
-                font_size=12,
-                bordercolor="white",
-            ),
+        # Main chart; built figures are shared by every viewer of the same data
+        fig = figure_cache().get_or_build(
+            (version, None, None, "dark"), lambda: history_figure(df)
         )
-        # Show plot
         st.plotly_chart(fig, use_container_width=True)
 
         # Add CO2 threshold warning
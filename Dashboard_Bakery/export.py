@@ -0,0 +1,222 @@
+import argparse
+import os
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+
+from loaders import (
+    MEASUREMENT_COLUMNS,
+    history_schema,
+    overlapping_row_groups,
+    process_environmental_data,
+    read_file_with_encoding,
+)
+
+EXPORT_FORMATS = ["csv", "parquet"]
+CHUNK_ROWS = 65536
+# Streamlit answers larger files in the app's static folder with a 404
+STATIC_FILE_LIMIT = 200 * 2**20
+
+
+def _select_columns(columns):
+    # The source file of merged uploads is kept, whichever channels are chosen
+    columns = MEASUREMENT_COLUMNS if columns is None else list(columns)
+    return (
+        ["timestamp"]
+        + [c for c in columns if c not in ("timestamp", "source")]
+        + ["source"]
+    )
+
+
+def iter_frame_chunks(df, start=None, end=None, columns=None, chunk_rows=CHUNK_ROWS):
+    """Yield slices of an in-memory history frame inside [start, end]"""
+    columns = [c for c in _select_columns(columns) if c in df.columns]
+    timestamps = df["timestamp"].to_numpy()
+
+    if len(timestamps) and np.all(timestamps[1:] >= timestamps[:-1]):
+        # Sorted history: the window is one contiguous block of rows
+        first = 0 if start is None else timestamps.searchsorted(np.datetime64(start))
+        last = (
+            len(timestamps)
+            if end is None
+            else timestamps.searchsorted(np.datetime64(end), side="right")
+        )
+        positions = None
+    else:
+        mask = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= np.datetime64(start)
+        if end is not None:
+            mask &= timestamps <= np.datetime64(end)
+        positions = np.flatnonzero(mask)
+        first, last = 0, len(positions)
+
+    for offset in range(first, last, chunk_rows):
+        stop = min(offset + chunk_rows, last)
+        if positions is None:
+            yield df.iloc[offset:stop][columns]
+        else:
+            yield df.iloc[positions[offset:stop]][columns]
+
+
+def iter_parquet_chunks(
+    source, start=None, end=None, columns=None, chunk_rows=CHUNK_ROWS
+):
+    """Yield record batches of a Parquet history store as DataFrames.
+
+    Row groups outside [start, end] are never read, and at most one
+    batch of ``chunk_rows`` rows is decoded at a time.
+    """
+    import pyarrow.parquet as pq
+
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+
+    parquet_file = pq.ParquetFile(source)
+    schema = parquet_file.schema_arrow
+    columns = [c for c in _select_columns(columns) if c in schema.names]
+    groups = overlapping_row_groups(
+        parquet_file.metadata, schema.get_field_index("timestamp"), start, end
+    )
+    if not groups:
+        return
+
+    for batch in parquet_file.iter_batches(
+        batch_size=chunk_rows, row_groups=groups, columns=columns
+    ):
+        chunk = batch.to_pandas()
+        if start is not None:
+            chunk = chunk[chunk["timestamp"] >= start]
+        if end is not None:
+            chunk = chunk[chunk["timestamp"] <= end]
+        if len(chunk):
+            yield chunk
+
+
+def write_chunks(chunks, destination, fmt="csv"):
+    """Stream chunks to a path or binary file object; returns rows written"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+
+    # Like the Parquet writer, a CSV path is only created once there is a row
+    rows = 0
+    if fmt == "csv":
+        handle = None
+        try:
+            for chunk in chunks:
+                if handle is None:
+                    handle = (
+                        open(destination, "wb")
+                        if isinstance(destination, str)
+                        else destination
+                    )
+                handle.write(
+                    chunk.to_csv(index=False, header=rows == 0).encode("utf-8")
+                )
+                rows += len(chunk)
+        finally:
+            if handle is not None and handle is not destination:
+                handle.close()
+        return rows
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(
+                chunk, schema=history_schema(chunk), preserve_index=False
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(destination, table.schema, compression="zstd")
+            # Each chunk becomes its own row group with its own time statistics
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def export_path(directory, name):
+    """Path of file ``name`` inside ``directory``, or None if it would land outside.
+
+    Only the final component of ``name`` is kept, and the resolved path must
+    sit directly in ``directory``, so neither ``../`` nor a symlink escapes it.
+    """
+    name = os.path.basename(name.strip().replace("\\", "/"))
+    if name in ("", ".", ".."):
+        return None
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.dirname(path) != root:
+        return None
+    return path
+
+
+def unused_path(path):
+    """``path``, or the first free ``<name>.partN<ext>`` next to it"""
+    if not os.path.exists(path):
+        return path
+    root, ext = os.path.splitext(path)
+    part = 1
+    while os.path.exists(f"{root}.part{part}{ext}"):
+        part += 1
+    return f"{root}.part{part}{ext}"
+
+
+def static_url(path, static_dir):
+    """URL Streamlit serves ``path`` under, or None if it is not in ``static_dir``"""
+    root = os.path.realpath(static_dir)
+    relative = os.path.relpath(os.path.realpath(path), root)
+    if relative == os.curdir or relative.split(os.sep)[0] == os.pardir:
+        return None
+    return "app/static/" + urllib.parse.quote(relative.replace(os.sep, "/"))
+
+
+def export_history(
+    source,
+    destination,
+    fmt="csv",
+    start=None,
+    end=None,
+    columns=None,
+    chunk_rows=CHUNK_ROWS,
+):
+    """Export a time range and set of channels from a frame or Parquet store"""
+    if isinstance(source, pd.DataFrame):
+        chunks = iter_frame_chunks(source, start, end, columns, chunk_rows)
+    else:
+        chunks = iter_parquet_chunks(source, start, end, columns, chunk_rows)
+    return write_chunks(chunks, destination, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export sensor history in chunks")
+    parser.add_argument("source", help="Data.txt-style log or Parquet history")
+    parser.add_argument("destination")
+    parser.add_argument("--format", choices=EXPORT_FORMATS)
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--columns", help="Comma-separated channel names")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.destination)[1].lstrip(".") or "csv"
+    columns = args.columns.split(",") if args.columns else None
+
+    source = args.source
+    if not source.endswith(".parquet"):
+        with open(source, "rb") as handle:
+            source = process_environmental_data(read_file_with_encoding(handle.read()))
+
+    rows = export_history(
+        source, args.destination, fmt, args.start, args.end, columns, args.chunk_rows
+    )
+    print(f"Exported {rows} rows to {args.destination}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.io as pio
+
+
+def data_version(df):
+    """Content fingerprint of a frame; frames holding the same rows share it"""
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+
+class FigureCache:
+    """Bounded LRU of serialized figures shared by every session.
+
+    Keys identify a chart, e.g. ``(data_version(df), start, end, theme)``.
+    Values are figure specs as plain dicts with the arrays already
+    base64-encoded, so a hit skips building the figure and encoding its
+    data. It does not skip Streamlit's own work: ``st.plotly_chart``
+    validates the dict into a figure again and serializes it on every
+    call, which for a long history is over half of what a miss costs.
+    Caching the figure object instead saves nothing, as serializing it
+    encodes the arrays again. Specs are shared between sessions and must
+    not be modified. The least recently used
+    entries are dropped once there are more than ``max_entries`` or their
+    serialized size passes ``max_bytes``.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=256 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, key, build):
+        """Cached spec for ``key``; on a miss ``build()`` makes the figure"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Built outside the lock so other charts are served meanwhile; two
+        # sessions missing the same key at once both build, the last one is kept
+        payload = pio.to_json(build(), validate=False)
+        spec = json.loads(payload)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[1]
+            self._entries[key] = (spec, len(payload))
+            self.size_bytes += len(payload)
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries
+                or self.size_bytes > self.max_bytes
+            ):
+                _, (_, size) = self._entries.popitem(last=False)
+                self.size_bytes -= size
+        return spec
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
@@ -0,0 +1,126 @@
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from chart_arrays import epoch_ms, float32
+
+
+def history_figure(df):
+    """Dark-theme temperature/humidity and CO2 chart of a history frame"""
+    fig = make_subplots(
+        rows=2,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.08,
+        subplot_titles=(
+            "<span style='color: white'>Temperature & Humidity</span>",
+            "<span style='color: white'>CO2 Levels</span>",
+        ),
+    )
+
+    # Typed arrays are sent base64-encoded rather than number by number
+    x = epoch_ms(df["timestamp"])
+
+    # Temperature and Humidity plot
+    fig.add_trace(
+        go.Scatter(
+            x=x,
+            y=float32(df["Temperature_In"]),
+            name="Indoor Temp",
+            line=dict(color="#FF9900", width=2),
+        ),
+        row=1,
+        col=1,
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=x,
+            y=float32(df["Temperature_Out"]),
+            name="Outdoor Temp",
+            line=dict(color="#FF99FF", width=2),
+        ),
+        row=1,
+        col=1,
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=x,
+            y=float32(df["Humidity_In"]),
+            name="Indoor Humidity",
+            line=dict(color="#0099FF", width=2),
+        ),
+        row=1,
+        col=1,
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=x,
+            y=float32(df["Humidity_Out"]),
+            name="Outdoor Humidity",
+            line=dict(color="#00FFFF", width=2),
+        ),
+        row=1,
+        col=1,
+    )
+
+    # CO2 plot
+    fig.add_trace(
+        go.Scatter(
+            x=x,
+            y=float32(df["CO2"]),
+            name="CO2",
+            line=dict(color="#FF0000", width=2),
+        ),
+        row=2,
+        col=1,
+    )
+
+    # Update layout for dark theme
+    fig.update_layout(
+        height=800,
+        showlegend=True,
+        plot_bgcolor="rgba(26,28,36,0.8)",
+        paper_bgcolor="rgba(26,28,36,0.8)",
+        legend=dict(
+            yanchor="top",
+            y=1.2,
+            xanchor="left",
+            x=0.01,
+            orientation="h",
+            font=dict(color="white"),
+        ),
+        font=dict(color="white"),
+    )
+
+    # Update axes for dark theme
+    fig.update_xaxes(
+        type="date",
+        showgrid=True,
+        gridwidth=1,
+        gridcolor="rgba(128,128,128,0.2)",
+        linecolor="rgba(128,128,128,0.2)",
+        tickfont=dict(color="white"),
+    )
+    fig.update_yaxes(
+        showgrid=True,
+        gridwidth=1,
+        gridcolor="rgba(128,128,128,0.2)",
+        linecolor="rgba(128,128,128,0.2)",
+        tickfont=dict(color="white"),
+        title_font=dict(color="white"),
+    )
+
+    # Add y-axis titles
+    fig.update_yaxes(title_text="Temperature (°C) / Humidity (%)", row=1, col=1)
+    fig.update_yaxes(title_text="CO2 (ppm)", row=2, col=1)
+
+    # Update hover template
+    fig.update_traces(
+        hovertemplate="<b>%{y:.1f}</b><br>%{x}<extra></extra>",
+        hoverlabel=dict(
+            bgcolor="rgba(26,28,36,0.8)",
+            font_color="white",
+            font_size=12,
+            bordercolor="white",
+        ),
+    )
+    return fig
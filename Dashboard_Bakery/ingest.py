@@ -0,0 +1,256 @@
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from loaders import (
+    process_environmental_data,
+    read_parquet_history,
+    write_parquet_history,
+)
+from merge import merge_frames
+
+# Each firmware frame ends with the CO2 line, "CO2: <value>  ppm"
+FRAME_END = b"ppm"
+
+
+def _prefix_hash(path, length):
+    digest = hashlib.sha1()
+    remaining = length
+    with open(path, "rb") as handle:
+        while remaining > 0:
+            chunk = handle.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def parse_file(path, offset, interval, start=None, end=None):
+    """Parse complete frames of ``path`` from byte ``offset`` onwards.
+
+    Rows are stamped ``interval`` apart from ``start``, or up to ``end``
+    when the file has no timeline yet. Runs in a worker process. Returns
+    the parsed rows, the offset just past the last complete frame and the
+    hash of the file up to it.
+    """
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        data = handle.read()
+
+    # Leave a half-written trailing frame for the next pass
+    cut = data.rfind(FRAME_END)
+    cut = 0 if cut < 0 else cut + len(FRAME_END)
+    df = process_environmental_data(
+        data[:cut].decode("latin-1"), interval=interval, end=end, start=start
+    )
+    df["source"] = os.path.splitext(os.path.basename(path))[0]
+    new_offset = offset + cut
+    return df, new_offset, _prefix_hash(path, new_offset)
+
+
+class FolderIngestor:
+    """Incrementally ingest a directory of Data.txt-style logs.
+
+    A JSON manifest records, per file, its size, mtime, the offset of
+    the last complete frame and a hash of the bytes before it. On each
+    pass unchanged files are skipped, files that only grew are parsed
+    from their offset, and anything else is reparsed, in parallel across
+    processes. Parsed rows are cached as one Parquet file per log, so a
+    restart never reparses completed files.
+
+    Logs carry no timestamps, so rows are stamped ``interval`` apart.
+    A file's timeline is anchored once, ending at its modification time
+    when first parsed, and kept in the manifest as ``start``: appended
+    rows continue it, and a reparse of the same file (e.g. after its
+    cache was lost) reproduces it. Files that disappear from the folder
+    are dropped from the manifest and the dataset.
+    """
+
+    def __init__(
+        self,
+        directory,
+        manifest_path=None,
+        cache_dir=None,
+        pattern="*.txt",
+        workers=None,
+        interval=timedelta(seconds=1),
+    ):
+        self.directory = directory
+        self.cache_dir = cache_dir or os.path.join(directory, ".ingest")
+        self.manifest_path = manifest_path or os.path.join(
+            self.cache_dir, "manifest.json"
+        )
+        self.pattern = pattern
+        self.workers = workers
+        self.interval = interval
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {}
+
+    def _save_manifest(self):
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        temporary = self.manifest_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(self.manifest, handle, indent=2, sort_keys=True)
+        # Atomic swap so a crash never leaves a half-written checkpoint
+        os.replace(temporary, self.manifest_path)
+
+    def _cache_path(self, path):
+        name = hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{name}.parquet")
+
+    def _timeline(self, entry, rows=0):
+        """Timestamp of row ``rows`` on the file's anchored timeline, or None"""
+        if entry is None or entry.get("start") is None:
+            return None
+        return datetime.fromisoformat(entry["start"]) + self.interval * rows
+
+    def _files(self):
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if fnmatch.fnmatch(name, self.pattern) and os.path.isfile(path):
+                yield path
+
+    def scan(self):
+        """Return ``(path, offset, start)`` for files that need parsing
+
+        ``start`` is the timestamp of the first row parsed from ``offset``,
+        or None for a file whose timeline is not anchored yet.
+        """
+        pending = []
+        for path in self._files():
+            stat = os.stat(path)
+            entry = self.manifest.get(path)
+            if entry is None:
+                pending.append((path, 0, None))
+            elif (
+                entry["size"] == stat.st_size
+                and entry["mtime"] == stat.st_mtime
+                and os.path.exists(entry["cache"])
+            ):
+                continue
+            elif stat.st_size >= entry["offset"] and entry["hash"] == _prefix_hash(
+                path, entry["offset"]
+            ):
+                if os.path.exists(entry["cache"]):
+                    # Only appended to: resume after the last complete frame
+                    pending.append(
+                        (path, entry["offset"], self._timeline(entry, entry["rows"]))
+                    )
+                else:
+                    # Cache lost: reparse onto the same timeline
+                    pending.append((path, 0, self._timeline(entry)))
+            else:
+                # Rewritten: a different log, with a timeline of its own
+                pending.append((path, 0, None))
+        return pending
+
+    def prune(self):
+        """Forget files that left the folder; returns their paths"""
+        present = set(self._files())
+        removed = [path for path in self.manifest if path not in present]
+        for path in removed:
+            entry = self.manifest.pop(path)
+            if os.path.exists(entry["cache"]):
+                os.remove(entry["cache"])
+        if removed:
+            self._save_manifest()
+        return removed
+
+    def run_once(self):
+        """Ingest new and changed files and drop removed ones; returns their paths"""
+        removed = self.prune()
+        pending = self.scan()
+        if not pending:
+            return removed
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        stats = {path: os.stat(path) for path, _, _ in pending}
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                path: pool.submit(
+                    parse_file,
+                    path,
+                    offset,
+                    self.interval,
+                    start,
+                    datetime.fromtimestamp(stats[path].st_mtime),
+                )
+                for path, offset, start in pending
+            }
+            for path, offset, _ in pending:
+                df, new_offset, prefix_hash = futures[path].result()
+                cache_path = self._cache_path(path)
+                if offset:
+                    df = pd.concat(
+                        [read_parquet_history(cache_path), df], ignore_index=True
+                    )
+                write_parquet_history(df, cache_path)
+                self.manifest[path] = {
+                    "size": stats[path].st_size,
+                    "mtime": stats[path].st_mtime,
+                    "offset": new_offset,
+                    "hash": prefix_hash,
+                    "rows": len(df),
+                    "cache": cache_path,
+                    # Anchored by the first parse that found rows, then kept
+                    "start": (df["timestamp"].iloc[0].isoformat() if len(df) else None),
+                }
+                # Checkpoint after every file so a restart resumes mid-pass
+                self._save_manifest()
+        return removed + [path for path, _, _ in pending]
+
+    def dataset(self):
+        """All ingested rows as one time-ordered DataFrame"""
+        frames = [
+            read_parquet_history(entry["cache"])
+            for path, entry in sorted(self.manifest.items())
+            if os.path.exists(entry["cache"])
+        ]
+        return merge_frames(frames)
+
+    def watch(self, poll_seconds=10):
+        """Poll the directory forever, yielding the paths updated on each pass"""
+        while True:
+            updated = self.run_once()
+            if updated:
+                yield updated
+            time.sleep(poll_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a folder of sensor logs")
+    parser.add_argument("directory")
+    parser.add_argument("--manifest")
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--pattern", default="*.txt")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--watch", type=float, metavar="SECONDS")
+    args = parser.parse_args()
+
+    ingestor = FolderIngestor(
+        args.directory, args.manifest, args.cache_dir, args.pattern, args.workers
+    )
+    if args.watch:
+        for updated in ingestor.watch(args.watch):
+            print(f"Ingested {len(updated)} files")
+    else:
+        updated = ingestor.run_once()
+        print(f"Ingested {len(updated)} files, {len(ingestor.dataset())} rows total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import re
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+MEASUREMENT_COLUMNS = [
+    "Humidity_Out",
+    "Temperature_Out",
+    "Humidity_In",
+    "Temperature_In",
+    "CO2",
+]
+
+# Regular expressions for all measurements in one group
+MEASUREMENT_PATTERN = re.compile(
+    r"Humidity out: (\d+\.\d+) %\s*"
+    r"Temperature out: (\d+\.\d+) \*C\s*"
+    r"Humidity IN: (\d+\.\d+) %\s*"
+    r"Temperature IN: (\d+\.\d+) \*C\s*"
+    r"CO2: (\d+\.\d+)\s+ppm"
+)
+
+
+def process_environmental_data(
+    text, interval=timedelta(minutes=1), end=None, start=None
+):
+    # Initialize lists to store the data
+    measurements = []
+
+    # Find all matches
+    matches = MEASUREMENT_PATTERN.finditer(text)
+
+    # Process each complete set of measurements
+    for match in matches:
+        measurements.append(
+            {
+                "Humidity_Out": float(match.group(1)),
+                "Temperature_Out": float(match.group(2)),
+                "Humidity_In": float(match.group(3)),
+                "Temperature_In": float(match.group(4)),
+                "CO2": float(match.group(5)),
+            }
+        )
+
+    # Create DataFrame from the list of dictionaries
+    df = pd.DataFrame(measurements, columns=MEASUREMENT_COLUMNS)
+
+    # Add simulated timestamp column, one interval per measurement, either
+    # from `start` or up to `end`
+    if start is not None:
+        base_time = start
+    else:
+        base_time = (end or datetime.now()) - interval * len(df)
+    df["timestamp"] = [base_time + interval * x for x in range(len(df))]
+
+    return df
+
+
+def read_file_with_encoding(file_content):
+    # Try different encodings
+    encodings = ["utf-8", "latin-1", "cp1252"]
+
+    for encoding in encodings:
+        try:
+            return file_content.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+
+    raise UnicodeDecodeError("Failed to decode file with any encoding")
+
+
+def history_schema(df):
+    """Arrow schema with typed timestamp/float32 columns for a history frame"""
+    import pyarrow as pa
+
+    fields = [pa.field("timestamp", pa.timestamp("us"))]
+    fields += [
+        pa.field(column, pa.float32())
+        for column in MEASUREMENT_COLUMNS
+        if column in df.columns
+    ]
+    if "source" in df.columns:
+        fields.append(pa.field("source", pa.string()))
+    return pa.schema(fields)
+
+
+def write_parquet_history(df, destination, row_group_size=3600):
+    """Write history as time-sorted Parquet with float32/timestamp columns.
+
+    Each row group covers a contiguous time range, so the min/max
+    statistics Parquet stores per row group let readers skip whole
+    groups when loading a time window.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = df.sort_values("timestamp", kind="stable")
+    table = pa.Table.from_pandas(df, schema=history_schema(df), preserve_index=False)
+    pq.write_table(
+        table,
+        destination,
+        row_group_size=row_group_size,
+        compression="zstd",
+        write_statistics=True,
+    )
+
+
+def overlapping_row_groups(metadata, column_index, start, end):
+    """Indices of row groups whose timestamp statistics overlap [start, end]"""
+    groups = []
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column_index).statistics
+        if stats is None or not stats.has_min_max:
+            groups.append(i)
+            continue
+        if start is not None and pd.Timestamp(stats.max) < start:
+            continue
+        if end is not None and pd.Timestamp(stats.min) > end:
+            continue
+        groups.append(i)
+    return groups
+
+
+def read_parquet_history(source, start=None, end=None, columns=None):
+    """Load history from Parquet, reading only row groups inside [start, end]"""
+    import pyarrow.parquet as pq
+
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+
+    parquet_file = pq.ParquetFile(source)
+    schema = parquet_file.schema_arrow
+    if columns is not None:
+        columns = ["timestamp"] + [c for c in columns if c != "timestamp"]
+
+    if start is None and end is None:
+        table = parquet_file.read(columns=columns)
+    else:
+        groups = overlapping_row_groups(
+            parquet_file.metadata, schema.get_field_index("timestamp"), start, end
+        )
+        table = parquet_file.read_row_groups(groups, columns=columns)
+
+    df = table.to_pandas()
+    if start is not None:
+        df = df[df["timestamp"] >= start]
+    if end is not None:
+        df = df[df["timestamp"] <= end]
+    return df.reset_index(drop=True)
@@ -0,0 +1,96 @@
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from loaders import (
+    process_environmental_data,
+    read_file_with_encoding,
+    read_parquet_history,
+)
+
+# A date in the file name (e.g. showcase2_2025-01-03.txt) anchors its timeline
+FILE_DATE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
+
+def _merge_two(left, right, keys):
+    """Interleave two runs of row positions whose keys are each sorted"""
+    left_keys = keys[left]
+    right_keys = keys[right]
+    # Ties keep the left run first, so the merge is stable
+    left_slots = np.searchsorted(right_keys, left_keys, side="left") + np.arange(
+        len(left)
+    )
+    right_slots = np.searchsorted(left_keys, right_keys, side="right") + np.arange(
+        len(right)
+    )
+    merged = np.empty(len(left) + len(right), dtype=np.int64)
+    merged[left_slots] = left
+    merged[right_slots] = right
+    return merged
+
+
+def merge_order(key_arrays):
+    """Row order that k-way merges already-sorted key arrays.
+
+    Positions refer to the arrays concatenated in the order given. Runs
+    are merged pairwise in a balanced tree, so each row moves
+    O(log k) times instead of being resorted with everything else.
+    """
+    if not key_arrays:
+        return np.zeros(0, dtype=np.int64)
+    keys = np.concatenate([np.asarray(k) for k in key_arrays])
+    runs = []
+    offset = 0
+    for k in key_arrays:
+        runs.append(np.arange(offset, offset + len(k)))
+        offset += len(k)
+
+    while len(runs) > 1:
+        paired = [
+            _merge_two(runs[i], runs[i + 1], keys) for i in range(0, len(runs) - 1, 2)
+        ]
+        if len(runs) % 2:
+            paired.append(runs[-1])
+        runs = paired
+    return runs[0]
+
+
+def merge_frames(frames, on="timestamp"):
+    """Merge frames that are each sorted on ``on`` into one sorted frame"""
+    frames = [
+        f if f[on].is_monotonic_increasing else f.sort_values(on, kind="stable")
+        for f in frames
+        if len(f)
+    ]
+    if not frames:
+        return pd.DataFrame()
+    keys = [f[on].to_numpy().astype("datetime64[ns]").view(np.int64) for f in frames]
+    order = merge_order(keys)
+    return pd.concat(frames, ignore_index=True).take(order).reset_index(drop=True)
+
+
+def parse_upload(name, content):
+    """Parse one uploaded file into a frame tagged with its source name"""
+    if name.endswith(".parquet"):
+        df = read_parquet_history(io.BytesIO(content))
+    else:
+        match = FILE_DATE.search(name)
+        start = datetime(*map(int, match.groups())) if match else None
+        df = process_environmental_data(read_file_with_encoding(content), start=start)
+    df["source"] = os.path.splitext(name)[0]
+    return df
+
+
+def parse_uploads(files, workers=None):
+    """Parse ``(name, content)`` pairs concurrently and merge their timelines"""
+    files = list(files)
+    if len(files) == 1:
+        return parse_upload(*files[0])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(parse_upload, *zip(*files)))
+    return merge_frames(frames)
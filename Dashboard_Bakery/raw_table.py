@@ -0,0 +1,42 @@
+import math
+
+import numpy as np
+
+PAGE_SIZES = [25, 50, 100, 250, 500]
+
+
+def range_mask(df, column, low=None, high=None):
+    """Boolean mask of rows whose ``column`` lies within [low, high]"""
+    values = df[column].to_numpy()
+    mask = np.ones(len(values), dtype=bool)
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+    return mask
+
+
+def page_slice(df, page, page_size, sort_by=None, ascending=True, mask=None):
+    """Return one page of ``df`` after server-side filtering and sorting.
+
+    Only row positions are sorted and sliced; the DataFrame itself is
+    indexed once, for the rows of the requested page. Returns
+    ``(page_df, matching_rows, page_count)``.
+    """
+    positions = np.arange(len(df)) if mask is None else np.flatnonzero(mask)
+
+    if sort_by is not None and len(positions):
+        values = df[sort_by].to_numpy()[positions]
+        if not ascending:
+            # Negate numbers to keep the sort stable; NaN still lands last
+            values = -values if np.issubdtype(values.dtype, np.number) else values
+        order = np.argsort(values, kind="stable")
+        if not ascending and not np.issubdtype(values.dtype, np.number):
+            order = order[::-1]
+        positions = positions[order]
+
+    matching = len(positions)
+    page_count = max(1, math.ceil(matching / page_size))
+    page = min(max(1, int(page)), page_count)
+    start = (page - 1) * page_size
+    return df.iloc[positions[start : start + page_size]], matching, page_count
@@ -0,0 +1,207 @@
+import numpy as np
+from datetime import timedelta
+
+# The live dashboards (arduino_python) and the history dashboard
+# (Dashboard_Bakery) are run and deployed on their own and never import each
+# other, so each folder carries this module. Keep the two copies identical
+# apart from formatting.
+
+FILL_POLICIES = ("none", "ffill", "linear")
+
+# Long-form capture rows (arduino_data.csv) mapped onto collector channels
+CAPTURE_COLUMNS = {
+    "OUT": {"hum_out": "humidity", "temp_out": "temperature"},
+    "IN": {"hum_in": "humidity", "temp_in": "temperature"},
+    "CO2": {"co2": "value"},
+}
+
+
+def _period_ns(period):
+    """Convert a period in seconds or a timedelta to integer nanoseconds"""
+    if isinstance(period, timedelta):
+        period = period.total_seconds()
+    period = int(round(float(period) * 1e9))
+    if period <= 0:
+        raise ValueError("Resampling period must be positive")
+    return period
+
+
+def _as_ns(times):
+    return np.asarray(times, dtype="datetime64[ns]").astype(np.int64)
+
+
+def _run_lengths(gaps):
+    """Length of the gap run that each position belongs to (0 outside gaps)"""
+    lengths = np.zeros(len(gaps), dtype=np.int64)
+    if not gaps.any():
+        return lengths
+    edges = np.diff(np.concatenate(([0], gaps.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    run_id = np.cumsum(edges[:-1] == 1) - 1
+    lengths[gaps] = (ends - starts)[run_id[gaps]]
+    return lengths
+
+
+def fill_gaps(values, gaps, fill="none", limit=None):
+    """Fill gap bins in place according to a fill policy.
+
+    ``limit`` is the longest gap (in bins) that may be filled, for every
+    policy: a longer outage stays NaN as a whole so it remains visible
+    downstream. Leading gaps are never filled, nor trailing ones by
+    ``linear``.
+    """
+    if fill not in FILL_POLICIES:
+        raise ValueError(
+            f"Unknown fill policy {fill!r}, expected one of {FILL_POLICIES}"
+        )
+    if fill == "none" or not gaps.any() or gaps.all():
+        return values
+
+    positions = np.arange(len(values))
+    valid = ~gaps
+    if fill == "ffill":
+        last_valid = np.maximum.accumulate(np.where(gaps, -1, positions))
+        fillable = gaps & (last_valid >= 0)
+    else:
+        inside = (positions > positions[valid][0]) & (positions < positions[valid][-1])
+        fillable = gaps & inside
+    if limit is not None:
+        fillable &= _run_lengths(gaps) <= limit
+
+    if fill == "ffill":
+        values[fillable] = values[last_valid[fillable]]
+    else:
+        values[fillable] = np.interp(
+            positions[fillable], positions[valid], values[valid]
+        )
+    return values
+
+
+def to_grid(
+    times, values, period, start=None, end=None, fill="none", limit=None, agg="mean"
+):
+    """Resample one irregular series onto a regular time grid.
+
+    Readings that are NaN count as missing. Each bin takes the mean (or
+    the last) of its valid readings. Returns ``(grid, values, gaps)``
+    where ``gaps`` is True for bins that had no valid reading, whether
+    or not the fill policy later filled them.
+    """
+    step = _period_ns(period)
+    t = _as_ns(times)
+    v = np.asarray(values, dtype=np.float64)
+    if len(t) != len(v):
+        raise ValueError("times and values must have the same length")
+
+    valid = np.isfinite(v)
+    t, v = t[valid], v[valid]
+    if len(t) and np.any(t[1:] < t[:-1]):
+        order = np.argsort(t, kind="stable")
+        t, v = t[order], v[order]
+
+    if start is None:
+        if not len(t):
+            empty = np.zeros(0, dtype="datetime64[ns]")
+            return empty, np.zeros(0), np.zeros(0, dtype=bool)
+        start = t[0] - t[0] % step
+    else:
+        start = int(_as_ns([start])[0])
+    if end is None:
+        end = t[-1] if len(t) else start
+    else:
+        end = int(_as_ns([end])[0])
+
+    size = max(0, (end - start) // step + 1)
+    grid = (start + step * np.arange(size)).astype("datetime64[ns]")
+
+    bins = (t - start) // step
+    inside = (bins >= 0) & (bins < size)
+    bins, v = bins[inside], v[inside]
+
+    out = np.full(size, np.nan)
+    counts = np.bincount(bins, minlength=size)
+    if agg == "mean":
+        sums = np.bincount(bins, weights=v, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = sums / counts
+    elif agg == "last":
+        last = np.ones(len(bins), dtype=bool)
+        last[:-1] = bins[1:] != bins[:-1]
+        out[bins[last]] = v[last]
+    else:
+        raise ValueError(f"Unknown aggregation {agg!r}")
+
+    gaps = counts == 0
+    out[gaps] = np.nan
+    fill_gaps(out, gaps, fill, limit)
+    return grid, out, gaps
+
+
+def align_channels(series, period, fill="none", limit=None, agg="mean"):
+    """Align several channels onto one shared regular grid.
+
+    ``series`` maps channel name to ``(timestamps, values)``, as returned
+    by ``SensorDataCollector.get_channel_series``. The result holds the
+    grid under ``'timestamps'``, a dense array per channel and a
+    per-channel gap mask under ``'gaps'``.
+    """
+    step = _period_ns(period)
+    starts, ends = [], []
+    for times, values in series.values():
+        t = _as_ns(times)[np.isfinite(np.asarray(values, dtype=np.float64))]
+        if len(t):
+            starts.append(t.min())
+            ends.append(t.max())
+
+    result = {"timestamps": np.zeros(0, dtype="datetime64[ns]"), "gaps": {}}
+    if not starts:
+        for name in series:
+            result[name] = np.zeros(0)
+            result["gaps"][name] = np.zeros(0, dtype=bool)
+        return result
+
+    start = min(starts)
+    start -= start % step
+    start = np.datetime64(int(start), "ns")
+    end = np.datetime64(int(max(ends)), "ns")
+    for name, (times, values) in series.items():
+        grid, out, gaps = to_grid(times, values, period, start, end, fill, limit, agg)
+        result[name] = out
+        result["gaps"][name] = gaps
+    result["timestamps"] = grid
+    return result
+
+
+def gap_spans(grid, gaps):
+    """List ``(first_missing, last_missing)`` timestamps for each gap run"""
+    if not len(gaps) or not gaps.any():
+        return []
+    edges = np.diff(np.concatenate(([0], gaps.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return list(zip(grid[starts], grid[ends]))
+
+
+def resample_collector(collector, period=1.0, fill="none", limit=None, agg="mean"):
+    """Resample the live collector buffer onto a regular grid"""
+    return align_channels(collector.get_channel_series(), period, fill, limit, agg)
+
+
+def load_capture_series(path):
+    """Read a long-form capture CSV (arduino_data.csv) into channel series"""
+    import pandas as pd
+
+    df = pd.read_csv(path, parse_dates=["timestamp"])
+    series = {}
+    for sensor, columns in CAPTURE_COLUMNS.items():
+        rows = df[df["sensor"] == sensor]
+        times = rows["timestamp"].to_numpy()
+        for name, column in columns.items():
+            series[name] = (times, rows[column].to_numpy(dtype=np.float64))
+    return series
+
+
+def resample_capture(path, period=1.0, fill="none", limit=None, agg="mean"):
+    """Load a long-form capture CSV and align its channels on a regular grid"""
+    return align_channels(load_capture_series(path), period, fill, limit, agg)
@@ -0,0 +1,113 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from loaders import MEASUREMENT_COLUMNS, MEASUREMENT_PATTERN
+
+# Start of a firmware frame; unmatched text before the last one can never complete
+FRAME_START = "Humidity out:"
+
+
+class LogTail:
+    """Follow a growing Data.txt-style log, parsing only appended bytes.
+
+    The tail remembers the byte offset it has read up to and the text
+    after the last complete frame (a frame can be split across writes).
+    Parsed rows go into growable NumPy columns, so a refresh costs time
+    proportional to the new data rather than the whole file. Rows are
+    stamped ``interval`` apart, ending at the time they were seen.
+    """
+
+    def __init__(self, path, interval=timedelta(minutes=1), read_size=1 << 20):
+        self.path = path
+        self.interval = interval
+        self.read_size = read_size
+        self.reset()
+
+    def reset(self):
+        """Forget everything read so far; the next refresh reparses the file"""
+        self.offset = 0
+        self.pending = ""
+        self.inode = None
+        self.rows = 0
+        self._values = np.empty((1024, len(MEASUREMENT_COLUMNS)))
+        self._timestamps = np.empty(1024, dtype="datetime64[us]")
+
+    def _grow(self, needed):
+        capacity = len(self._timestamps)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        values = np.empty((capacity, len(MEASUREMENT_COLUMNS)))
+        values[: self.rows] = self._values[: self.rows]
+        timestamps = np.empty(capacity, dtype="datetime64[us]")
+        timestamps[: self.rows] = self._timestamps[: self.rows]
+        self._values, self._timestamps = values, timestamps
+
+    def refresh(self):
+        """Parse whatever was appended since the last call; returns new row count"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Not created yet, or between a rotation and the new file
+            return 0
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            # Rotated or truncated: start over from the beginning
+            self.reset()
+            self.inode = stat.st_ino
+
+        parsed = []
+        with open(self.path, "rb") as handle:
+            handle.seek(self.offset)
+            while True:
+                chunk = handle.read(self.read_size)
+                if not chunk:
+                    break
+                self.offset += len(chunk)
+                # Measurements are ASCII; latin-1 never fails on stray bytes
+                parsed.extend(self._parse(self.pending + chunk.decode("latin-1")))
+
+        if parsed:
+            self._append(parsed)
+        return len(parsed)
+
+    def _parse(self, text):
+        rows = []
+        end = 0
+        for match in MEASUREMENT_PATTERN.finditer(text):
+            rows.append(tuple(map(float, match.groups())))
+            end = match.end()
+
+        # Keep only what could still become a complete frame
+        start = text.rfind(FRAME_START, end)
+        if start >= 0:
+            self.pending = text[start:]
+        else:
+            self.pending = text[max(end, len(text) - len(FRAME_START)) :]
+        return rows
+
+    def _append(self, parsed):
+        count = len(parsed)
+        self._grow(self.rows + count)
+        self._values[self.rows : self.rows + count] = parsed
+
+        step = np.timedelta64(self.interval).astype("timedelta64[us]")
+        first = np.datetime64(datetime.now(), "us") - step * count
+        if self.rows:
+            first = max(first, self._timestamps[self.rows - 1] + step)
+        self._timestamps[self.rows : self.rows + count] = first + step * np.arange(
+            count
+        )
+        self.rows += count
+
+    @property
+    def frame(self):
+        """The parsed log as a DataFrame shaped like process_environmental_data"""
+        df = pd.DataFrame(
+            self._values[: self.rows], columns=MEASUREMENT_COLUMNS, copy=False
+        )
+        df["timestamp"] = self._timestamps[: self.rows]
+        return df
@@ -26,6 +26,54 @@ int sensorValue = 0;
 #define DHTiTYPE DHT11
 DHT dhto(DHToPIN, DHToTYPE);
 DHT dhti(DHTiPIN, DHTiTYPE);
+
+// 1 = send 19-byte binary frames instead of text (see arduino_python/binary_protocol.py)
+#define BINARY_FRAMES 0
+// The DHT11 only refreshes about once a second, so faster sampling repeats values
+#define SAMPLE_INTERVAL_MS 1000
+#define FLAG_ALARM 0x01
+#define MISSING_I16 -32768
+#define MISSING_U32 0xFFFFFFFFUL
+uint16_t frameSeq = 0;
+
+uint16_t crc16_ccitt(const uint8_t *data, uint8_t len) {
+  uint16_t crc = 0xFFFF;
+  for (uint8_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+int16_t scaled(float value) {
+  return isnan(value) ? MISSING_I16 : (int16_t)lround(value * 10);
+}
+
+void put16(uint8_t *p, uint16_t v) {
+  p[0] = v & 0xFF;
+  p[1] = v >> 8;
+}
+
+// A5 5A | seq | flags | ho, to, hi, ti (x10) | co2 (x100) | CRC over seq..co2
+void sendFrame(float ho, float to, float hi, float ti, float ppm, bool alarm) {
+  uint8_t frame[19];
+  frame[0] = 0xA5;
+  frame[1] = 0x5A;
+  put16(frame + 2, frameSeq++);
+  frame[4] = alarm ? FLAG_ALARM : 0;
+  put16(frame + 5, scaled(ho));
+  put16(frame + 7, scaled(to));
+  put16(frame + 9, scaled(hi));
+  put16(frame + 11, scaled(ti));
+  uint32_t co2 = isnan(ppm) ? MISSING_U32 : (uint32_t)lround(ppm * 100);
+  put16(frame + 13, co2 & 0xFFFF);
+  put16(frame + 15, co2 >> 16);
+  put16(frame + 17, crc16_ccitt(frame + 2, 15));
+  Serial.write(frame, sizeof(frame));
+}
+
 void setup() {
 
 Serial.begin(9600);
@@ -42,7 +90,16 @@ float ho = dhto.readHumidity();
 float to = dhto.readTemperature();
 
 //if (isnan(ho) || isnan(to)) {}
+float hi = dhti.readHumidity();
 
+float ti = dhti.readTemperature();
+float ppm = gasSensor.getPPM();
+ float threshold = 60*ho/100.0;
+ bool alarm = hi>threshold && ti > 25;
+
+#if BINARY_FRAMES
+sendFrame(ho, to, hi, ti, ppm, alarm);
+#else
 Serial.print("Humidity out: ");
 
 Serial.print(ho);
@@ -54,11 +111,6 @@ Serial.print("Temperature out: ");
 Serial.print(to);
 
 Serial.println(" *C");
-float hi = dhti.readHumidity();
-
-float ti = dhti.readTemperature();
-
-//if (isnan(ho) || isnan(to)) {}
 
 Serial.print("Humidity IN: ");
 
@@ -71,20 +123,21 @@ Serial.print("Temperature IN: ");
 Serial.print(ti);
 
 Serial.println(" *C");
-float ppm = gasSensor.getPPM();
 Serial.print ("CO2: ");
 Serial.print (ppm);
 Serial.println ("  ppm");
+#endif
 
- float threshold = 60*ho/100.0;
  //Serial.println (threshold);
-if (hi>threshold && ti > 25){
+if (alarm){
+#if !BINARY_FRAMES
 Serial.println ("alarm");
+#endif
   digitalWrite(buzzer , HIGH);
   delay (300);
   digitalWrite(buzzer , LOW);
 }
 
-delay(1000);
+delay(SAMPLE_INTERVAL_MS);
 
 }
@@ -0,0 +1,147 @@
+import argparse
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from capture import CAPTURE_COLUMNS
+from fleet import decode_batch
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS batches (
+    device TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    received TEXT NOT NULL,
+    records INTEGER NOT NULL,
+    PRIMARY KEY (device, seq)
+);
+CREATE TABLE IF NOT EXISTS readings (
+    device TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    co2 REAL, temp_in REAL, temp_out REAL, hum_in REAL, hum_out REAL
+);
+CREATE INDEX IF NOT EXISTS readings_device_ts ON readings (device, ts);
+CREATE INDEX IF NOT EXISTS readings_ts ON readings (ts);
+'''
+CHANNELS = ('co2', 'temp_in', 'temp_out', 'hum_in', 'hum_out')
+
+
+class FleetStore:
+    """Time-indexed SQLite store of readings from every showcase.
+
+    Readings are indexed by (device, timestamp) and by timestamp alone.
+    Each batch is recorded with its (device, seq) in the same transaction
+    as its readings, so a resent batch is recognised and skipped.
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def ingest(self, device, seq, records):
+        """Store one batch; returns False if it was already stored"""
+        rows = [(device, record['t']) + tuple(record.get(name) for name in CHANNELS)
+                for record in records]
+        with self._lock, self.connection:
+            inserted = self.connection.execute(
+                'INSERT OR IGNORE INTO batches VALUES (?, ?, ?, ?)',
+                (device, seq, datetime.now().isoformat(), len(records))).rowcount
+            if not inserted:
+                return False
+            self.connection.executemany(
+                'INSERT INTO readings VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        return True
+
+    def devices(self):
+        with self._lock:
+            return [row[0] for row in self.connection.execute(
+                'SELECT DISTINCT device FROM batches ORDER BY device')]
+
+    def query(self, device=None, start=None, end=None):
+        """Rows (device, datetime, co2, temp_in, temp_out, hum_in, hum_out) in time order"""
+        clauses, params = [], []
+        if device is not None:
+            clauses.append('device = ?')
+            params.append(device)
+        if start is not None:
+            clauses.append('ts >= ?')
+            params.append(int(start.timestamp() * 1000))
+        if end is not None:
+            clauses.append('ts <= ?')
+            params.append(int(end.timestamp() * 1000))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            rows = self.connection.execute(
+                f'SELECT * FROM readings {where} ORDER BY ts', params).fetchall()
+        return [(row[0], datetime.fromtimestamp(row[1] / 1000)) + row[2:] for row in rows]
+
+    def history_frame(self, device=None, start=None, end=None):
+        """Readings as a DataFrame in the history dashboard's columns, tagged by source"""
+        import pandas as pd
+
+        df = pd.DataFrame(self.query(device, start, end),
+                          columns=('source', 'timestamp') + CHANNELS)
+        return df.rename(columns=CAPTURE_COLUMNS)
+
+    def close(self):
+        self.connection.close()
+
+
+class FleetServer(ThreadingHTTPServer):
+    # The default backlog of 5 resets connections when many showcases flush together
+    request_queue_size = 512
+
+
+def make_server(store, host='127.0.0.1', port=8765):
+    """HTTP server accepting gzipped JSON batches on POST /ingest"""
+
+    class IngestHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != '/ingest':
+                self.send_error(404)
+                return
+            payload = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            try:
+                batch = decode_batch(payload)
+                stored = store.ingest(batch['device'], int(batch['seq']), batch['records'])
+            except (OSError, ValueError, KeyError, TypeError):
+                self.send_error(400, 'Malformed batch')
+                return
+            body = json.dumps({'status': 'stored' if stored else 'duplicate'}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FleetServer((host, port), IngestHandler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fleet aggregator for showcase collectors')
+    parser.add_argument('--db', default='fleet.sqlite')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    store = FleetStore(args.db)
+    server = make_server(store, args.host, args.port)
+    print(f'Aggregating into {args.db} on http://{args.host}:{args.port}/ingest')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from collector import CO2_ALARM_PPM, PORT_ERRORS, SensorDataCollector, classify_line
+
+
+class AsyncSensorCollector:
+    """Event-loop driven serial reader yielding parsed sensor records.
+
+    The port is opened non-blocking and its file descriptor is watched
+    with ``loop.add_reader``, so no thread is spent per device. Complete
+    lines are parsed with the same ``classify_line`` as the synchronous
+    collector and queued as records::
+
+        async with AsyncSensorCollector('/dev/ttyACM0') as reader:
+            async for record in reader:
+                ...
+
+    Each record is the ``parse_line`` dict plus ``timestamp``, ``device``
+    and ``arrival``, the ``time.monotonic()`` stamp of its read. Every
+    line is also stored in ``collector`` (built with ``port=None``; one is
+    made when none is given), so synchronous dashboards can share the same
+    data. The collector also owns the port: a lost port is reopened by
+    ``SensorDataCollector.reconnect()``, with its backoff and outage
+    record, and iteration carries on once it is back. If the consumer
+    falls behind by ``max_queue`` records, the oldest are dropped and
+    counted in ``dropped``. Closing the reader closes the collector.
+    """
+
+    def __init__(self, port, baudrate=9600, device_id=None, collector=None,
+                 max_queue=1000, poll_interval=0.05):
+        if collector is None:
+            collector = SensorDataCollector(port=None, device_id=device_id)
+        # The reader's port, opened non-blocking, replaces the collector's
+        collector.port = port
+        collector.baudrate = baudrate
+        collector.timeout = 0
+        self.port = port
+        self.baudrate = baudrate
+        self.device_id = device_id
+        self.collector = collector
+        self.poll_interval = poll_interval
+        self.dropped = 0
+
+        self.max_queue = max_queue
+        self._partial = b''
+        self._loop = None
+        self._fd = None
+        self._poll_task = None
+        # Created in open() so they belong to the running loop
+        self._queue = None
+        self._closed = None
+
+    async def open(self):
+        """Open the port and start feeding records from the event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._closed = asyncio.Event()
+        # Raises if the port cannot be opened at all; later losses are retried
+        self.collector.open()
+        if not self._watch():
+            self._poll_task = self._loop.create_task(self._poll())
+        return self
+
+    def _watch(self):
+        """Have the loop call _on_readable for the open port; False if it must be polled"""
+        try:
+            fd = self.collector.serial_port.fileno()
+            self._loop.add_reader(fd, self._on_readable)
+        except (NotImplementedError, AttributeError):
+            # Windows serial handles are not selectable
+            return False
+        self._fd = fd
+        return True
+
+    def _unwatch(self):
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._fd = None
+
+    async def _poll(self):
+        """Poll a port the loop cannot watch, and wait out a lost one"""
+        while not self._closed.is_set():
+            if not self.collector.connected:
+                if self.collector.reconnect() and self._watch():
+                    break
+            else:
+                try:
+                    waiting = self.collector.serial_port.in_waiting
+                except PORT_ERRORS as e:
+                    self._lost(e)
+                    waiting = 0
+                if waiting:
+                    self._on_readable()
+            await asyncio.sleep(self.poll_interval)
+        self._poll_task = None
+
+    def _lost(self, error):
+        """Drop a failed port; _poll() reopens it through the collector"""
+        self._unwatch()
+        self.collector.port_failed(error)
+        self._partial = b''
+        if self._poll_task is None:
+            self._poll_task = self._loop.create_task(self._poll())
+
+    def _on_readable(self):
+        serial_port = self.collector.serial_port
+        try:
+            chunk = serial_port.read(serial_port.in_waiting or 1)
+        except PORT_ERRORS as e:
+            self._lost(e)
+            return
+        if not chunk:
+            return
+
+        arrival = time.monotonic()
+        lines = (self._partial + chunk).split(b'\n')
+        # The last piece is an unfinished line; keep it for the next read
+        self._partial = lines.pop()
+        now = datetime.now()
+        for raw in lines:
+            line = raw.decode('utf-8', errors='replace').strip()
+            if not line or not self.collector.in_sync(line):
+                continue
+            record, error = classify_line(line)
+            self.collector.stats.record(line, record, error)
+            if record is None:
+                continue
+            parsed = time.monotonic()
+            self.collector.store_reading(record, now)
+            self.collector.latency.record(
+                arrival, parsed, time.monotonic(),
+                record['type'] == 'co2' and record['value'] > CO2_ALARM_PPM)
+            record['timestamp'] = now
+            record['device'] = self.device_id
+            record['arrival'] = arrival
+            self._put(record)
+
+    def _put(self, record):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(record)
+
+    async def read(self):
+        """Wait for the next parsed record; returns None once closed"""
+        if self._closed.is_set() and self._queue.empty():
+            return None
+        getter = asyncio.ensure_future(self._queue.get())
+        closer = asyncio.ensure_future(self._closed.wait())
+        done, _ = await asyncio.wait({getter, closer}, return_when=asyncio.FIRST_COMPLETED)
+        if getter in done:
+            closer.cancel()
+            return getter.result()
+        getter.cancel()
+        return None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        record = await self.read()
+        if record is None:
+            raise StopAsyncIteration
+        return record
+
+    def close(self):
+        """Stop reading and close the collector; pending iterators finish"""
+        if self._closed is None or self._closed.is_set():
+            return
+        self._closed.set()
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+        self._unwatch()
+        self.collector.close()
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+
+async def _print_records(port):
+    async with AsyncSensorCollector(port) as reader:
+        async for record in reader:
+            print(record)
+
+
+if __name__ == '__main__':
+    asyncio.run(_print_records(os.environ.get('SENSOR_PORT', 'COM11')))
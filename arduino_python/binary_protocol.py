@@ -0,0 +1,159 @@
+import binascii
+import struct
+
+import numpy as np
+
+# Frame layout, little-endian, 19 bytes:
+#   A5 5A | seq u16 | flags u8 | hum_out, temp_out, hum_in, temp_in i16 (x10)
+#   | co2 u32 (x100) | CRC-16/CCITT-FALSE u16 over seq..co2
+SYNC = b'\xa5\x5a'
+FRAME_FORMAT = '<2sHB4hIH'
+FRAME_SIZE = struct.calcsize(FRAME_FORMAT)
+CRC_START = 2
+CRC_END = FRAME_SIZE - 2
+
+FLAG_ALARM = 0x01
+MISSING_I16 = -32768
+MISSING_U32 = 0xFFFFFFFF
+
+CHANNELS = ('hum_out', 'temp_out', 'hum_in', 'temp_in')
+SCALE = 10.0
+CO2_SCALE = 100.0
+
+FRAME_DTYPE = np.dtype([
+    ('seq', np.uint16),
+    ('alarm', np.bool_),
+    ('hum_out', np.float32),
+    ('temp_out', np.float32),
+    ('hum_in', np.float32),
+    ('temp_in', np.float32),
+    ('co2', np.float32)
+])
+
+
+def _crc_table():
+    table = np.zeros(256, dtype=np.uint16)
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+        table[byte] = crc & 0xFFFF
+    return table
+
+
+CRC_TABLE = _crc_table()
+
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE of a bytes object (matches the firmware)"""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def encode_frame(seq, values, alarm=False):
+    """Build one binary frame from a dict of readings (nan/None -> missing)"""
+    fields = []
+    for name in CHANNELS:
+        value = values.get(name)
+        fields.append(MISSING_I16 if value is None or value != value
+                      else int(round(value * SCALE)))
+    co2 = values.get('co2')
+    co2 = MISSING_U32 if co2 is None or co2 != co2 else int(round(co2 * CO2_SCALE))
+    body = struct.pack('<HB4hI', seq & 0xFFFF, FLAG_ALARM if alarm else 0, *fields, co2)
+    return SYNC + body + struct.pack('<H', crc16(body))
+
+
+class BinaryFrameDecoder:
+    """Batch decoder for the binary frame stream.
+
+    ``feed()`` takes any amount of raw bytes and returns every complete,
+    CRC-valid frame as a NumPy structured array (``FRAME_DTYPE``). Sync
+    search, CRC checks and field decoding are vectorized over the batch.
+    Bytes of an incomplete trailing frame are kept for the next call.
+    Gaps in the sequence number are counted in ``dropped_frames`` and bytes
+    outside any valid frame in ``skipped_bytes``. A sync pattern that fails
+    the CRC counts as a ``crc_errors`` corrupted frame, unless it lies inside
+    a valid frame's payload; those are only ``resync_misses``.
+    """
+
+    def __init__(self):
+        self.pending = b''
+        self.last_seq = None
+        self.frames = 0
+        self.crc_errors = 0
+        self.resync_misses = 0
+        self.dropped_frames = 0
+        self.skipped_bytes = 0
+
+    def feed(self, data):
+        buf = np.frombuffer(self.pending + bytes(data), dtype=np.uint8)
+        if len(buf) < FRAME_SIZE:
+            self.pending = buf.tobytes()
+            return np.zeros(0, dtype=FRAME_DTYPE)
+
+        starts = np.flatnonzero((buf[:-1] == SYNC[0]) & (buf[1:] == SYNC[1]))
+        starts = starts[starts + FRAME_SIZE <= len(buf)]
+        windows = buf[starts[:, None] + np.arange(FRAME_SIZE)]
+
+        # Table-driven CRC, one byte column at a time across all candidates
+        crc = np.full(len(starts), 0xFFFF, dtype=np.uint16)
+        for column in range(CRC_START, CRC_END):
+            index = ((crc >> 8) ^ windows[:, column]) & 0xFF
+            crc = ((crc << 8) & 0xFFFF) ^ CRC_TABLE[index]
+        expected = (windows[:, CRC_END].astype(np.uint16)
+                    | (windows[:, CRC_END + 1].astype(np.uint16) << 8))
+        valid = crc == expected
+
+        # Failed candidates starting inside a valid frame are payload bytes, not frames
+        failed = starts[~valid]
+        inside = np.zeros(len(failed), dtype=bool)
+        if valid.any() and len(failed):
+            valid_starts = starts[valid]
+            previous = np.searchsorted(valid_starts, failed, side='right') - 1
+            inside = (previous >= 0) & (
+                failed < valid_starts[np.maximum(previous, 0)] + FRAME_SIZE)
+        self.resync_misses += int(np.count_nonzero(inside))
+        self.crc_errors += int(np.count_nonzero(~inside))
+
+        starts, windows = starts[valid], windows[valid]
+        if len(starts) > 1 and np.any(np.diff(starts) < FRAME_SIZE):
+            # A sync pattern inside a valid frame's payload; keep frames greedily
+            keep = np.zeros(len(starts), dtype=bool)
+            next_free = -1
+            for i, start in enumerate(starts):
+                if start >= next_free:
+                    keep[i] = True
+                    next_free = start + FRAME_SIZE
+            starts, windows = starts[keep], windows[keep]
+
+        consumed = len(buf) - (FRAME_SIZE - 1)
+        if len(starts):
+            consumed = max(consumed, int(starts[-1]) + FRAME_SIZE)
+        self.skipped_bytes += consumed - FRAME_SIZE * len(starts)
+        self.pending = buf[consumed:].tobytes()
+
+        frames = np.zeros(len(starts), dtype=FRAME_DTYPE)
+        if not len(starts):
+            return frames
+
+        body = np.ascontiguousarray(windows)
+        seq = body[:, 2:4].copy().view('<u2')[:, 0]
+        readings = body[:, 5:13].copy().view('<i2')
+        co2 = body[:, 13:17].copy().view('<u4')[:, 0]
+
+        frames['seq'] = seq
+        frames['alarm'] = (body[:, 4] & FLAG_ALARM) != 0
+        for i, name in enumerate(CHANNELS):
+            column = readings[:, i]
+            frames[name] = np.where(column == MISSING_I16, np.nan, column / SCALE)
+        frames['co2'] = np.where(co2 == MISSING_U32, np.nan, co2 / CO2_SCALE)
+
+        # Sequence numbers wrap at 2**16; any jump beyond +1 is lost frames
+        if self.last_seq is None:
+            previous, current = seq[:-1], seq[1:]
+        else:
+            previous, current = np.concatenate(([self.last_seq], seq[:-1])), seq
+        gaps = (current.astype(np.int64) - previous.astype(np.int64) - 1) % 65536
+        self.dropped_frames += int(gaps.sum())
+        self.last_seq = int(seq[-1])
+        self.frames += len(frames)
+        return frames
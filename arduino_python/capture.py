@@ -0,0 +1,136 @@
+import os
+from datetime import datetime
+
+# Collector channel -> column name used by the history dashboard (Dashboard_Bakery)
+CAPTURE_COLUMNS = {
+    'hum_out': 'Humidity_Out',
+    'temp_out': 'Temperature_Out',
+    'hum_in': 'Humidity_In',
+    'temp_in': 'Temperature_In',
+    'co2': 'CO2'
+}
+
+
+def _schema():
+    import pyarrow as pa
+
+    fields = [pa.field('timestamp', pa.timestamp('us'))]
+    fields += [pa.field(column, pa.float32()) for column in CAPTURE_COLUMNS.values()]
+    return pa.schema(fields)
+
+
+def _unused_path(path):
+    """``path``, or the first free ``<name>.partN<ext>`` next to it"""
+    if not os.path.exists(path):
+        return path
+    root, ext = os.path.splitext(path)
+    part = 1
+    while os.path.exists(f'{root}.part{part}{ext}'):
+        part += 1
+    return f'{root}.part{part}{ext}'
+
+
+class ParquetCapture:
+    """Write collector frames to Parquet, one row group per ``row_group_size`` frames.
+
+    ``path`` may contain strftime fields (e.g. ``'capture_%Y%m%d.parquet'``);
+    a new file is started whenever the formatted name changes. Parquet only
+    writes its footer on close, so rotating files bounds what a crash can lose.
+    An existing file is never overwritten: a restart on the same day (or
+    writing again after ``close()``) continues in ``capture_20250101.part1.parquet``,
+    ``.part2`` and so on, named in ``file_path``. The files load directly in
+    the history dashboard.
+    """
+
+    def __init__(self, path, row_group_size=600):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.current_path = None
+        self.file_path = None
+        self._writer = None
+        self._timestamps = []
+        self._columns = {name: [] for name in CAPTURE_COLUMNS}
+
+    def append(self, timestamp, values):
+        """Buffer one full frame; same signature as CompactHistory.append"""
+        path = timestamp.strftime(self.path) if isinstance(timestamp, datetime) else self.path
+        if path != self.current_path:
+            self.flush()
+            self._close_writer()
+            self.current_path = path
+
+        self._timestamps.append(timestamp)
+        for name, column in self._columns.items():
+            value = values.get(name)
+            column.append(None if value is None else float(value))
+
+        if len(self._timestamps) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered frames as one row group"""
+        if not self._timestamps:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = _schema()
+        arrays = [pa.array(self._timestamps, type=pa.timestamp('us'))]
+        arrays += [pa.array(self._columns[name], type=pa.float32()) for name in CAPTURE_COLUMNS]
+        table = pa.Table.from_arrays(arrays, schema=schema)
+
+        if self._writer is None:
+            self.file_path = _unused_path(self.current_path)
+            self._writer = pq.ParquetWriter(self.file_path, schema, compression='zstd')
+        self._writer.write_table(table)
+
+        self._timestamps = []
+        self._columns = {name: [] for name in CAPTURE_COLUMNS}
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def close(self):
+        """Flush pending frames and write the Parquet footer"""
+        self.flush()
+        self._close_writer()
+
+
+def load_capture(path, start=None, end=None):
+    """Read a capture file into NumPy arrays keyed by collector channel.
+
+    Row groups whose timestamp statistics fall outside [start, end] are
+    skipped without being decoded.
+    """
+    import numpy as np
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    start = None if start is None else np.datetime64(start, 'us')
+    end = None if end is None else np.datetime64(end, 'us')
+
+    groups = []
+    column_index = parquet_file.schema_arrow.get_field_index('timestamp')
+    for i in range(parquet_file.metadata.num_row_groups):
+        stats = parquet_file.metadata.row_group(i).column(column_index).statistics
+        if stats is not None and stats.has_min_max:
+            if start is not None and np.datetime64(stats.max, 'us') < start:
+                continue
+            if end is not None and np.datetime64(stats.min, 'us') > end:
+                continue
+        groups.append(i)
+
+    table = parquet_file.read_row_groups(groups)
+    timestamps = table.column('timestamp').to_numpy()
+    keep = np.ones(len(timestamps), dtype=bool)
+    if start is not None:
+        keep &= timestamps >= start
+    if end is not None:
+        keep &= timestamps <= end
+
+    data = {'timestamps': timestamps[keep]}
+    for name, column in CAPTURE_COLUMNS.items():
+        data[name] = table.column(column).to_numpy(zero_copy_only=False)[keep]
+    return data
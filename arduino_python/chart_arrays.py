@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+# Plotly (>= 6) sends numpy arrays to the browser base64-encoded instead of
+# as JSON numbers; epoch milliseconds need float64, readings fit in float32
+
+# The live dashboards (arduino_python) and the history dashboard
+# (Dashboard_Bakery) are run and deployed on their own and never import each
+# other, so each folder carries this module. Keep the two copies identical.
+
+
+def epoch_ms(timestamps):
+    """Naive datetimes -> float64 ms since the epoch, keeping the wall-clock time.
+
+    Plotly plots numbers on a date axis as UTC milliseconds, so the naive
+    local times are converted as if they were UTC and display unchanged.
+    Missing timestamps become NaN.
+    """
+    # pandas converts datetime objects about ten times faster than numpy does
+    stamps = np.asarray(pd.to_datetime(timestamps), dtype='datetime64[ms]')
+    ms = stamps.astype(np.int64).astype(np.float64)
+    ms[np.isnat(stamps)] = np.nan
+    return ms
+
+
+def float32(values):
+    """Readings as a float32 array; gaps stay NaN"""
+    return np.asarray(values, dtype=np.float32)
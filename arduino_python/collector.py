@@ -0,0 +1,493 @@
+import argparse
+import re
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+import serial
+
+from instrumentation import Instrumentation
+from latency import LatencyTracker
+
+# CO2 level (ppm) above which the dashboard raises its alarm
+CO2_ALARM_PPM = 725
+
+# Reconnect backoff after the port drops (seconds, doubling per failed attempt)
+RECONNECT_MIN = 0.5
+RECONNECT_MAX = 30.0
+FRAME_START = 'Humidity out'
+
+# What reading a lost port raises; on Linux a port closed under a pending
+# read fails in select() with TypeError rather than SerialException
+PORT_ERRORS = (serial.SerialException, OSError, TypeError)
+
+# Firmware lines; a failed DHT/MQ135 read prints "nan" in place of the number
+NUMBER = r'(-?\d+\.?\d*|nan)'
+ENV_LINE = re.compile(r'Humidity (\w+): *' + NUMBER + r' *%\s*Temperature \w+: *' + NUMBER + r' *\*C')
+CO2_LINE = re.compile(r'CO2: *' + NUMBER + r' *ppm')
+STATUS_LINES = ('alarm',)
+
+
+def classify_line(line):
+    """Parse a line into (reading, error) without raising.
+
+    ``reading`` is the parse_line dict or None. ``error`` names what was
+    wrong: 'nan_reading' (parsed, but a sensor reported nan), 'truncated'
+    (a known line cut short), 'malformed' (a known line that does not
+    parse) or 'unknown'. Firmware status lines such as "alarm" give
+    (None, None). A line holding a replacement character (bytes that were
+    not UTF-8) is a 'decode_error' whether or not it parses, so each line
+    counts towards one error class only.
+    """
+    data, error = _classify(line)
+    if '\ufffd' in line:
+        error = 'decode_error'
+    return data, error
+
+
+def _classify(line):
+    if line.startswith('Humidity'):
+        match = ENV_LINE.match(line)
+        if match is None:
+            return None, 'malformed' if line.endswith('*C') else 'truncated'
+        label, humidity, temperature = match.groups()
+        data = {
+            'type': 'env',
+            'sensor': 'IN' if label == 'IN' else 'OUT',
+            'humidity': float(humidity),
+            'temperature': float(temperature)
+        }
+        return data, 'nan_reading' if 'nan' in (humidity, temperature) else None
+    if line.startswith('CO2'):
+        match = CO2_LINE.match(line)
+        if match is None:
+            return None, 'malformed' if line.endswith('ppm') else 'truncated'
+        value = match.group(1)
+        return {'type': 'co2', 'value': float(value)}, 'nan_reading' if value == 'nan' else None
+    if line in STATUS_LINES:
+        return None, None
+    return None, 'unknown'
+
+
+def parse_line(line):
+    """Parse a single line of sensor data"""
+    return classify_line(line)[0]
+
+
+def data_mark(plot_data):
+    """(points, last timestamp): changes whenever a reading or gap is added"""
+    timestamps = plot_data['timestamps']
+    return len(timestamps), timestamps[-1] if timestamps else None
+
+
+class ParseStats:
+    """Line, reading and parse-error counts with a sample of recent bad lines"""
+
+    def __init__(self, max_samples=50):
+        self.started = time.monotonic()
+        self.lines = 0
+        self.readings = 0
+        self.errors = Counter()
+        self.bad_lines = deque(maxlen=max_samples)
+        # Binary protocol only, from the frame decoder: frames lost to sequence
+        # gaps, bytes outside any valid frame, false sync patterns inside frames
+        self.dropped_frames = 0
+        self.skipped_bytes = 0
+        self.resync_misses = 0
+        # Frames a history store failed to take (disk full, spool errors), by
+        # store class; not line errors, and never mistaken for a lost port
+        self.store_errors = Counter()
+        self.last_store_error = None
+
+    def record(self, line, data, error):
+        self.lines += 1
+        if data is not None:
+            self.readings += 1
+        if error is not None:
+            self.error(error, line)
+
+    def error(self, error, line=''):
+        self.errors[error] += 1
+        self.bad_lines.append((datetime.now(), error, line))
+
+    def rates(self):
+        """Per-second line, reading and per-class error rates since start"""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rates = {'lines': self.lines / elapsed, 'readings': self.readings / elapsed}
+        for error, count in self.errors.items():
+            rates[error] = count / elapsed
+        rates['error_ratio'] = sum(self.errors.values()) / self.lines if self.lines else 0.0
+        return rates
+
+
+class SensorDataCollector:
+    def __init__(self, port='COM11', baudrate=9600, max_points=100, history=None,
+                 device_id=None, protocol='text', retention=None, timeout=1):
+        # port=None leaves the port to the caller, who feeds lines to handle_line();
+        # event-loop readers pass timeout=0 and read through serial_port themselves
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.serial_port = None
+        if port is not None:
+            self.open()
+        self.max_points = max_points
+        self.device_id = device_id
+        
+        # 'binary' expects the firmware's BINARY_FRAMES output (see binary_protocol.py)
+        self.protocol = protocol
+        self.decoder = None
+        if protocol == 'binary':
+            from binary_protocol import BinaryFrameDecoder
+            self.decoder = BinaryFrameDecoder()
+        
+        # Optional long-term store (CompactHistory, ParquetCapture, FleetShipper) fed one
+        # frame per CO2 line; a list feeds several stores
+        self.history = history
+        if history is None:
+            self.history_stores = []
+        elif isinstance(history, (list, tuple)):
+            self.history_stores = list(history)
+        else:
+            self.history_stores = [history]
+        
+        # Optional TieredRetention: the whole shift for the chart, downsampled with age
+        self.retention = retention
+        
+        # Serial arrival -> parsed -> buffered stamps; the dashboard closes them on render
+        self.latency = LatencyTracker()
+        
+        # Stage timers; disabled (no-op) unless the dashboard swaps in its own
+        self.timers = Instrumentation()
+        self.stats = ParseStats()
+        
+        # Initialize deques for storing data
+        self.timestamps = deque(maxlen=max_points)
+        self.co2_values = deque(maxlen=max_points)
+        self.temp_in_values = deque(maxlen=max_points)
+        self.temp_out_values = deque(maxlen=max_points)
+        self.hum_in_values = deque(maxlen=max_points)
+        self.hum_out_values = deque(maxlen=max_points)
+        
+        # Arrival time of each reading, per sensor line
+        self.co2_timestamps = deque(maxlen=max_points)
+        self.in_timestamps = deque(maxlen=max_points)
+        self.out_timestamps = deque(maxlen=max_points)
+        
+        # Store latest values for metrics
+        self.latest_values = {
+            'co2': 0,
+            'temp_in': 0,
+            'temp_out': 0,
+            'hum_in': 0,
+            'hum_out': 0
+        }
+        
+        # Connection state; outages are (start, end) datetimes, end None while down
+        self.connected = self.serial_port is not None
+        self.outages = deque(maxlen=100)
+        self.reconnect_attempts = 0
+        self.closed = False
+        self._retry_at = 0.0
+        self._resync = False
+
+    def open(self):
+        """Open the port now; raises if it cannot be opened (reconnect() retries quietly)"""
+        self.serial_port = serial.Serial(port=self.port, baudrate=self.baudrate,
+                                         timeout=self.timeout)
+        self.connected = True
+
+    def parse_line(self, line):
+        """Parse a single line of sensor data"""
+        return parse_line(line)
+
+    def read_data(self, max_lines=1):
+        """Read a single data point from serial port
+
+        With ``max_lines`` > 1, keeps reading while lines are waiting, so a
+        backlog (e.g. after a reconnect) is caught up in one call. A lost
+        port is reopened in the background of later calls, with backoff.
+        """
+        if not self.connected:
+            if not self.reconnect():
+                return False
+        if self.decoder is not None:
+            return self.read_frames()
+        stored = False
+        for _ in range(max_lines):
+            # Only the port calls are guarded: a failing store is not a lost port
+            try:
+                if not self.serial_port.in_waiting:
+                    break
+                with self.timers.stage('serial_read'):
+                    raw = self.serial_port.readline()
+            except PORT_ERRORS as e:
+                self.port_failed(e)
+                break
+            arrival = time.monotonic()
+            self.timers.count('lines')
+            line = raw.decode('utf-8', errors='replace').strip()
+            if not self.in_sync(line):
+                continue
+            if line and self.handle_line(line, datetime.now(), arrival):
+                stored = True
+        return stored
+
+    def in_sync(self, line):
+        """False for lines before the first frame start after a reconnect, which may be cut"""
+        if self._resync:
+            if not line.startswith(FRAME_START):
+                return False
+            self._resync = False
+        return True
+
+    def port_failed(self, error):
+        """Record a read error (one of PORT_ERRORS) and drop the port until reconnect()"""
+        self.stats.error('serial_error', str(error))
+        self.disconnect()
+
+    def disconnect(self, when=None):
+        """Drop a failed port; the outage lasts until reconnect() succeeds
+
+        Also for a port that never opened, so a device missing at startup
+        shows up as an outage from the first attempt.
+        """
+        if self.serial_port is not None:
+            try:
+                self.serial_port.close()
+            except PORT_ERRORS:
+                pass
+        if not (self.outages and self.outages[-1][1] is None):
+            self.outages.append([when or datetime.now(), None])
+            self.mark_gap(self.outages[-1][0])
+        self.connected = False
+        self.reconnect_attempts = 0
+        self._retry_at = time.monotonic()
+
+    def reconnect(self):
+        """Try to reopen the port if the backoff has elapsed; never blocks on waiting
+
+        Every reader (this class, CollectorManager, AsyncSensorCollector)
+        reopens lost ports through here, so they share the backoff and
+        outage record.
+        """
+        if self.connected:
+            return True
+        if self.port is None or self.closed or time.monotonic() < self._retry_at:
+            return False
+        try:
+            self.open()
+        except PORT_ERRORS:
+            delay = min(RECONNECT_MIN * 2 ** self.reconnect_attempts, RECONNECT_MAX)
+            self.reconnect_attempts += 1
+            self._retry_at = time.monotonic() + delay
+            return False
+        
+        self._resync = True
+        if self.decoder is not None:
+            # The board restarts its sequence numbers and may have cut a frame
+            self.decoder.pending = b''
+            self.decoder.last_seq = None
+        if self.outages and self.outages[-1][1] is None:
+            self.outages[-1][1] = datetime.now()
+        return True
+
+    def mark_gap(self, when):
+        """Append a missing sample to every buffer so charts break the line at ``when``"""
+        nan = float('nan')
+        self.timestamps.append(when)
+        for timestamps in (self.co2_timestamps, self.in_timestamps, self.out_timestamps):
+            timestamps.append(when)
+        for values in (self.co2_values, self.temp_in_values, self.temp_out_values,
+                       self.hum_in_values, self.hum_out_values):
+            values.append(nan)
+        self.append_history(when, dict.fromkeys(self.latest_values, nan))
+
+    def append_history(self, when, values):
+        """Hand one frame to every history store and the retention tiers
+
+        A store that raises is counted in ``stats.store_errors`` and misses
+        this frame; the live buffers and the other stores still get it.
+        """
+        stores = self.history_stores
+        if self.retention is not None:
+            stores = stores + [self.retention]
+        for store in stores:
+            try:
+                store.append(when, values)
+            except Exception as e:
+                name = type(store).__name__
+                self.stats.store_errors[name] += 1
+                self.stats.last_store_error = f'{name}: {e}'
+
+    def read_frames(self):
+        """Read every binary frame waiting on the serial port in one batch"""
+        try:
+            waiting = self.serial_port.in_waiting
+            if not waiting:
+                return False
+            data = self.serial_port.read(waiting)
+        except PORT_ERRORS as e:
+            self.port_failed(e)
+            return False
+        return self.handle_frames(data) > 0
+
+    def handle_frames(self, data, arrival=None):
+        """Decode binary protocol bytes and store their readings; returns frames stored
+
+        Bytes of an unfinished frame are kept for the next call, so a
+        reader may pass whatever the port delivered.
+        """
+        if arrival is None:
+            arrival = time.monotonic()
+        current_time = datetime.now()
+        crc_errors = self.decoder.crc_errors
+        frames = self.decoder.feed(data)
+        parsed = time.monotonic()
+        self.stats.lines += len(frames)
+        self.stats.readings += 3 * len(frames)
+        if self.decoder.crc_errors > crc_errors:
+            self.stats.errors['crc_error'] += self.decoder.crc_errors - crc_errors
+        self.stats.dropped_frames = self.decoder.dropped_frames
+        self.stats.skipped_bytes = self.decoder.skipped_bytes
+        self.stats.resync_misses = self.decoder.resync_misses
+        for frame in frames.tolist():
+            _, _, hum_out, temp_out, hum_in, temp_in, co2 = frame
+            self.store_reading({'type': 'env', 'sensor': 'OUT', 'humidity': hum_out,
+                                'temperature': temp_out}, current_time)
+            self.store_reading({'type': 'env', 'sensor': 'IN', 'humidity': hum_in,
+                                'temperature': temp_in}, current_time)
+            self.store_reading({'type': 'co2', 'value': co2}, current_time)
+            self.latency.record(arrival, parsed, time.monotonic(), co2 > CO2_ALARM_PPM)
+        return len(frames)
+
+    def handle_line(self, line, current_time=None, arrival=None):
+        """Parse one text line and store its readings; True if it held data
+
+        ``arrival`` is the ``time.monotonic()`` stamp taken when the line
+        came off the port; it defaults to now.
+        """
+        if arrival is None:
+            arrival = time.monotonic()
+        with self.timers.stage('parse_line'):
+            data, error = classify_line(line)
+        self.stats.record(line, data, error)
+        if not data:
+            return False
+        parsed = time.monotonic()
+        with self.timers.stage('store_reading'):
+            self.store_reading(data, current_time)
+        self.timers.count('readings')
+        self.latency.record(arrival, parsed, time.monotonic(),
+                            data['type'] == 'co2' and data['value'] > CO2_ALARM_PPM)
+        return True
+
+    def store_reading(self, data, current_time=None):
+        """Append one parsed reading (a parse_line result) to the buffers"""
+        if current_time is None:
+            current_time = datetime.now()
+        self.timestamps.append(current_time)
+        
+        if data['type'] == 'co2':
+            self.co2_timestamps.append(current_time)
+            self.co2_values.append(data['value'])
+            self.latest_values['co2'] = data['value']
+            # CO2 closes the firmware's frame, so the snapshot is complete
+            self.append_history(current_time, self.latest_values)
+        elif data['type'] == 'env':
+            if data['sensor'] == 'IN':
+                self.in_timestamps.append(current_time)
+                self.temp_in_values.append(data['temperature'])
+                self.hum_in_values.append(data['humidity'])
+                self.latest_values['temp_in'] = data['temperature']
+                self.latest_values['hum_in'] = data['humidity']
+            else:
+                self.out_timestamps.append(current_time)
+                self.temp_out_values.append(data['temperature'])
+                self.hum_out_values.append(data['humidity'])
+                self.latest_values['temp_out'] = data['temperature']
+                self.latest_values['hum_out'] = data['humidity']
+
+    def get_data_for_plots(self):
+        """Get current data in format suitable for plotting"""
+        return {
+            'timestamps': list(self.timestamps),
+            'co2': list(self.co2_values),
+            'temp_in': list(self.temp_in_values),
+            'temp_out': list(self.temp_out_values),
+            'hum_in': list(self.hum_in_values),
+            'hum_out': list(self.hum_out_values)
+        }
+
+    def get_retained_data(self):
+        """Whole-shift data from the retention tiers, or the live window without them"""
+        if self.retention is None:
+            return self.get_data_for_plots()
+        return self.retention.to_plot_data()
+
+    def get_channel_series(self):
+        """Get (timestamps, values) per channel, paired by arrival time"""
+        return {
+            'co2': (list(self.co2_timestamps), list(self.co2_values)),
+            'temp_in': (list(self.in_timestamps), list(self.temp_in_values)),
+            'temp_out': (list(self.out_timestamps), list(self.temp_out_values)),
+            'hum_in': (list(self.in_timestamps), list(self.hum_in_values)),
+            'hum_out': (list(self.out_timestamps), list(self.hum_out_values))
+        }
+
+    def close(self):
+        """Close the serial connection; a closed collector does not reconnect"""
+        self.closed = True
+        self.connected = False
+        if self.serial_port and self.serial_port.is_open:
+            self.serial_port.close()
+        for store in self.history_stores:
+            if hasattr(store, 'close'):
+                store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless sensor collector')
+    parser.add_argument('--port', default='COM11')
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--protocol', choices=('text', 'binary'), default='text')
+    parser.add_argument('--capture', help='Parquet capture path (strftime fields allowed)')
+    parser.add_argument('--fleet-url', help='aggregator endpoint, e.g. http://host:8765/ingest')
+    parser.add_argument('--device-id', default='showcase', help='name reported to the aggregator')
+    parser.add_argument('--spool-dir', default='fleet_spool')
+    parser.add_argument('--push-port', type=int,
+                        help='also serve the live SSE page on this HTTP port')
+    parser.add_argument('--count', type=int, help='stop after this many readings')
+    parser.add_argument('--quiet', action='store_true', help="don't print readings")
+    args = parser.parse_args()
+
+    history = []
+    if args.capture:
+        from capture import ParquetCapture
+        history.append(ParquetCapture(args.capture))
+    if args.fleet_url:
+        from fleet import FleetShipper
+        history.append(FleetShipper(args.fleet_url, args.device_id, args.spool_dir))
+    if args.push_port:
+        from push_server import PushFeed
+        history.append(PushFeed(port=args.push_port))
+        print(f'Live page on http://localhost:{args.push_port}/ (events at /events)')
+    collector = SensorDataCollector(port=args.port, baudrate=args.baudrate,
+                                    history=history, protocol=args.protocol)
+    readings = 0
+    try:
+        while args.count is None or readings < args.count:
+            if collector.read_data():
+                readings += 1
+                if not args.quiet:
+                    print(collector.latest_values, flush=True)
+            else:
+                time.sleep(0.01)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+import os
+import selectors
+import threading
+import time
+from datetime import datetime
+
+from collector import PORT_ERRORS, SensorDataCollector
+
+
+def parse_devices(spec):
+    """Parse 'showcase1=COM11,showcase2=/dev/ttyACM0' into {device_id: port}"""
+    devices = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        device_id, _, port = item.partition('=')
+        if not port:
+            # A bare port name doubles as its device id
+            port = device_id
+        devices[device_id.strip()] = port.strip()
+    return devices
+
+
+class CollectorManager:
+    """Read several showcases' serial ports from a single event loop.
+
+    Ports are opened non-blocking and registered with a selector, so one
+    ``poll()`` call services every device whose bytes have arrived. Each
+    device feeds its own ``SensorDataCollector`` buffer, tagged with the
+    device id. ``protocol='binary'`` reads every device's BINARY_FRAMES
+    output (see binary_protocol.py) instead of text lines. On platforms
+    where serial handles cannot be selected (Windows), ``poll()`` falls
+    back to checking ``in_waiting``.
+
+    Each collector owns its device's port. A device whose port fails is
+    marked disconnected, with a gap in its buffers, and is reopened by
+    ``SensorDataCollector.reconnect()`` with the usual backoff; the other
+    devices keep being read meanwhile. That includes a device that is
+    missing when the manager starts.
+    """
+
+    def __init__(self, devices, baudrate=9600, max_points=100, history_factory=None,
+                 protocol='text'):
+        self.collectors = {}
+        self._partial = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        self.selector = selectors.DefaultSelector() if os.name != 'nt' else None
+        for device_id, port in devices.items():
+            history = history_factory(device_id) if history_factory else None
+            collector = SensorDataCollector(
+                port=None, baudrate=baudrate, max_points=max_points, history=history,
+                device_id=device_id, protocol=protocol, timeout=0)
+            collector.port = port
+            self.collectors[device_id] = collector
+            self._partial[device_id] = b''
+            try:
+                collector.open()
+            except PORT_ERRORS as e:
+                # Unplugged at startup: down from the start, reopened by poll()
+                collector.port_failed(e)
+                continue
+            self._watch(device_id)
+
+    def _watch(self, device_id):
+        if self.selector is not None:
+            self.selector.register(self.collectors[device_id].serial_port,
+                                   selectors.EVENT_READ, device_id)
+
+    def _lost(self, device_id, error):
+        """Mark a failed device disconnected until reconnect() reopens it"""
+        collector = self.collectors[device_id]
+        if self.selector is not None:
+            # By fd: the failed port may no longer report its fileno()
+            for key in list(self.selector.get_map().values()):
+                if key.data == device_id:
+                    self.selector.unregister(key.fd)
+        with self._lock:
+            collector.port_failed(error)
+        self._partial[device_id] = b''
+
+    def _reconnect(self):
+        for device_id, collector in self.collectors.items():
+            if not collector.connected and collector.reconnect():
+                self._watch(device_id)
+
+    def _ready_devices(self, timeout):
+        if self.selector is not None:
+            if not self.selector.get_map():
+                # Every device is down; select() would not wait on an empty set everywhere
+                time.sleep(timeout)
+                return []
+            return [key.data for key, _ in self.selector.select(timeout)]
+        ready = []
+        for device_id, collector in self.collectors.items():
+            if not collector.connected:
+                continue
+            try:
+                if collector.serial_port.in_waiting:
+                    ready.append(device_id)
+            except PORT_ERRORS as e:
+                self._lost(device_id, e)
+        return ready
+
+    def poll(self, timeout=0):
+        """Read whatever has arrived on any port; returns the number of readings stored"""
+        self._reconnect()
+        stored = 0
+        for device_id in self._ready_devices(timeout):
+            collector = self.collectors[device_id]
+            try:
+                chunk = collector.serial_port.read(collector.serial_port.in_waiting or 1)
+            except PORT_ERRORS as e:
+                self._lost(device_id, e)
+                continue
+            arrival = time.monotonic()
+            if not chunk:
+                continue
+            if collector.decoder is not None:
+                # The decoder keeps a partial frame itself; three readings per frame
+                with self._lock:
+                    stored += 3 * collector.handle_frames(chunk, arrival)
+                continue
+            lines = (self._partial[device_id] + chunk).split(b'\n')
+            # The last piece is an unfinished line; keep it for the next read
+            self._partial[device_id] = lines.pop()
+            now = datetime.now()
+            with self._lock:
+                for raw in lines:
+                    line = raw.decode('utf-8', errors='replace').strip()
+                    if not line or not collector.in_sync(line):
+                        continue
+                    if collector.handle_line(line, now, arrival):
+                        stored += 1
+        return stored
+
+    def start(self, timeout=0.5):
+        """Run the poll loop on one background thread for all devices"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                self.poll(timeout)
+
+        self._thread = threading.Thread(target=run, name='collector-manager', daemon=True)
+        self._thread.start()
+
+    def snapshot(self, device_id):
+        """Plot data and latest values of one device, consistent with the poll loop"""
+        collector = self.collectors[device_id]
+        with self._lock:
+            return collector.get_data_for_plots(), dict(collector.latest_values)
+
+    def channel_series(self, device_id):
+        """Per-channel (timestamps, values) of one device, consistent with the poll loop"""
+        collector = self.collectors[device_id]
+        with self._lock:
+            return collector.get_channel_series()
+
+    def close(self):
+        """Stop the poll loop and close every collector with its port"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.selector is not None:
+            self.selector.close()
+        for collector in self.collectors.values():
+            collector.close()
@@ -0,0 +1,180 @@
+import zlib
+from array import array
+
+import numpy as np
+
+CHANNELS = ('hum_out', 'temp_out', 'hum_in', 'temp_in', 'co2')
+
+# Fixed-point steps: 0.1 % / 0.1 °C for the DHT11s, 0.01 ppm for CO2
+DEFAULT_SCALES = {
+    'hum_out': 10,
+    'temp_out': 10,
+    'hum_in': 10,
+    'temp_in': 10,
+    'co2': 100
+}
+
+# int16 code reserved for a missing (nan) reading
+MISSING = -32768
+INT16_MAX = 32767
+
+
+class _Block:
+    """A sealed run of samples: int16 deltas plus the values they start from"""
+    __slots__ = ('start_ns', 'end_ns', 'count', 'bases', 'payload', 'compressed')
+
+    def __init__(self, start_ns, end_ns, count, bases, payload, compressed):
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.count = count
+        self.bases = bases
+        self.payload = payload
+        self.compressed = compressed
+
+
+class CompactHistory:
+    """Append-only sensor history stored as delta-encoded int16 fixed point.
+
+    Each sample is one row of int16 codes: the time step in milliseconds
+    followed by the change of every channel since its previous valid
+    reading. Rows are grouped in blocks of ``block_size`` samples; a block
+    is sealed early when a delta does not fit in int16. Sealed blocks are
+    zlib-compressed by default, which takes the long runs of zero deltas
+    produced by slow-moving sensors down to a few bytes per sample.
+    """
+
+    def __init__(self, block_size=4096, scales=None, compress=True):
+        self.block_size = block_size
+        self.scales = dict(DEFAULT_SCALES, **(scales or {}))
+        self.compress = compress
+        self.blocks = []
+
+        self._rows = array('h')
+        self._count = 0
+        self._start_ns = 0
+        self._last_ns = 0
+        self._bases = [0] * len(CHANNELS)
+        self._previous = [0] * len(CHANNELS)
+
+    def __len__(self):
+        return sum(block.count for block in self.blocks) + self._count
+
+    def append(self, timestamp, values):
+        """Add one full sample; ``values`` maps channel name to reading"""
+        now_ns = int(np.datetime64(timestamp, 'ns').astype(np.int64))
+
+        codes = []
+        for name in CHANNELS:
+            value = values.get(name)
+            if value is None or value != value:
+                codes.append(None)
+            else:
+                codes.append(int(round(value * self.scales[name])))
+
+        if self._count:
+            step_ms = (now_ns - self._last_ns) // 1_000_000
+            deltas = [None if code is None else code - prev
+                      for code, prev in zip(codes, self._previous)]
+            fits = 0 <= step_ms <= INT16_MAX and all(
+                delta is None or -INT16_MAX <= delta <= INT16_MAX for delta in deltas
+            )
+            if not fits or self._count >= self.block_size:
+                self.seal()
+
+        if not self._count:
+            # A fresh block starts from this sample's own values
+            self._start_ns = now_ns
+            self._last_ns = now_ns
+            self._bases = [0 if code is None else code for code in codes]
+            self._previous = list(self._bases)
+            step_ms = 0
+            deltas = [None if code is None else 0 for code in codes]
+        else:
+            # Keep the clock on whole milliseconds so decoding is exact
+            self._last_ns += step_ms * 1_000_000
+
+        self._rows.append(step_ms)
+        for i, delta in enumerate(deltas):
+            if delta is None:
+                self._rows.append(MISSING)
+            else:
+                self._rows.append(delta)
+                self._previous[i] = codes[i]
+        self._count += 1
+
+    def seal(self):
+        """Close the open block so it is stored (and compressed) on its own"""
+        if not self._count:
+            return
+        payload = self._rows.tobytes()
+        if self.compress:
+            payload = zlib.compress(payload, 1)
+        self.blocks.append(_Block(self._start_ns, self._last_ns, self._count,
+                                  tuple(self._bases), payload, self.compress))
+        self._rows = array('h')
+        self._count = 0
+
+    def _decode(self, start_ns, count, bases, raw):
+        rows = np.frombuffer(raw, dtype=np.int16).reshape(count, len(CHANNELS) + 1)
+        times = start_ns + np.cumsum(rows[:, 0], dtype=np.int64) * 1_000_000
+        columns = {}
+        for i, name in enumerate(CHANNELS):
+            deltas = rows[:, i + 1].astype(np.int64)
+            missing = deltas == MISSING
+            deltas[missing] = 0
+            codes = bases[i] + np.cumsum(deltas)
+            values = (codes / self.scales[name]).astype(np.float32)
+            values[missing] = np.nan
+            columns[name] = values
+        return times, columns
+
+    def decode_block(self, index):
+        """Decode a sealed block into (epoch-ns times, {channel: float32 array})"""
+        block = self.blocks[index]
+        raw = zlib.decompress(block.payload) if block.compressed else block.payload
+        return self._decode(block.start_ns, block.count, block.bases, raw)
+
+    def to_arrays(self, start=None, end=None):
+        """Decode the history, or the blocks overlapping [start, end], to NumPy"""
+        start_ns = None if start is None else int(np.datetime64(start, 'ns').astype(np.int64))
+        end_ns = None if end is None else int(np.datetime64(end, 'ns').astype(np.int64))
+
+        parts = []
+        for i, block in enumerate(self.blocks):
+            if start_ns is not None and block.end_ns < start_ns:
+                continue
+            if end_ns is not None and block.start_ns > end_ns:
+                continue
+            parts.append(self.decode_block(i))
+        if self._count:
+            parts.append(self._decode(self._start_ns, self._count, self._bases,
+                                      self._rows.tobytes()))
+
+        if parts:
+            times = np.concatenate([times for times, _ in parts])
+            columns = {name: np.concatenate([cols[name] for _, cols in parts])
+                       for name in CHANNELS}
+        else:
+            times = np.zeros(0, dtype=np.int64)
+            columns = {name: np.zeros(0, dtype=np.float32) for name in CHANNELS}
+
+        keep = np.ones(len(times), dtype=bool)
+        if start_ns is not None:
+            keep &= times >= start_ns
+        if end_ns is not None:
+            keep &= times <= end_ns
+        data = {'timestamps': times[keep].astype('datetime64[ns]')}
+        for name in CHANNELS:
+            data[name] = columns[name][keep]
+        return data
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by encoded samples and block headers"""
+        header = 8 * (3 + len(CHANNELS))
+        sealed = sum(len(block.payload) + header for block in self.blocks)
+        return sealed + self._rows.buffer_info()[1] * self._rows.itemsize + header
+
+    def bytes_per_sample(self):
+        count = len(self)
+        return self.nbytes / count if count else 0.0
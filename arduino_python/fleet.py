@@ -0,0 +1,146 @@
+import gzip
+import json
+import math
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Sender backoff while the aggregator is unreachable (seconds, doubling)
+RETRY_MIN = 1.0
+RETRY_MAX = 60.0
+
+
+def encode_batch(device_id, seq, records):
+    """Gzipped JSON body for one batch; NaN readings become null"""
+    body = {'device': device_id, 'seq': seq, 'records': records}
+    return gzip.compress(json.dumps(body, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_batch(payload):
+    return json.loads(gzip.decompress(payload))
+
+
+class FleetShipper:
+    """Ship collector frames to a central aggregator in compressed batches.
+
+    Use it as (one of) a collector's ``history`` stores. Frames are
+    grouped into batches of ``batch_size`` frames, or fewer once
+    ``flush_interval`` seconds have passed. Each batch gets the next
+    sequence number and is written to ``spool_dir`` before a background
+    thread POSTs it. The file is deleted only once the aggregator
+    acknowledges it, so batches survive network outages and restarts.
+    Because the aggregator ignores a (device, seq) it has already stored,
+    resending after a lost acknowledgement is safe.
+    """
+
+    def __init__(self, url, device_id, spool_dir, batch_size=60, flush_interval=30.0,
+                 timeout=10.0):
+        self.url = url
+        self.device_id = device_id
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.sent_batches = 0
+        self.failed_attempts = 0
+
+        os.makedirs(spool_dir, exist_ok=True)
+        self._state_path = os.path.join(spool_dir, 'state.json')
+        self.next_seq = self._load_seq()
+        self._records = []
+        self._batch_started = time.monotonic()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._send_loop, name='fleet-shipper',
+                                        daemon=True)
+        self._thread.start()
+
+    def _load_seq(self):
+        try:
+            with open(self._state_path) as f:
+                return json.load(f)['next_seq']
+        except FileNotFoundError:
+            return 0
+
+    def _spooled(self):
+        return sorted(name for name in os.listdir(self.spool_dir) if name.endswith('.json.gz'))
+
+    @property
+    def pending_batches(self):
+        return len(self._spooled())
+
+    def append(self, timestamp, values):
+        """Queue one frame; same signature as CompactHistory.append"""
+        record = {'t': int(timestamp.timestamp() * 1000)}
+        for name, value in values.items():
+            record[name] = None if value is None or math.isnan(value) else float(value)
+        with self._lock:
+            self._records.append(record)
+            due = (len(self._records) >= self.batch_size
+                   or time.monotonic() - self._batch_started >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Spool the frames gathered so far as one batch and wake the sender"""
+        with self._lock:
+            records, self._records = self._records, []
+            self._batch_started = time.monotonic()
+            if not records:
+                return
+            seq = self.next_seq
+            self.next_seq += 1
+            path = os.path.join(self.spool_dir, f'{seq:012d}.json.gz')
+            with open(path + '.tmp', 'wb') as f:
+                f.write(encode_batch(self.device_id, seq, records))
+            os.replace(path + '.tmp', path)
+            with open(self._state_path + '.tmp', 'w') as f:
+                json.dump({'next_seq': self.next_seq}, f)
+            os.replace(self._state_path + '.tmp', self._state_path)
+        self._wake.set()
+
+    def _post(self, payload):
+        request = urllib.request.Request(self.url, data=payload, method='POST', headers={
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip'
+        })
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.status == 200
+
+    def _send_loop(self):
+        delay = RETRY_MIN
+        while not self._stop.is_set():
+            for name in self._spooled():
+                path = os.path.join(self.spool_dir, name)
+                with open(path, 'rb') as f:
+                    payload = f.read()
+                try:
+                    delivered = self._post(payload)
+                except (urllib.error.URLError, OSError):
+                    delivered = False
+                if not delivered:
+                    self.failed_attempts += 1
+                    break
+                os.remove(path)
+                self.sent_batches += 1
+                delay = RETRY_MIN
+            else:
+                # Spool drained; sleep until the next batch (or a periodic check)
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                continue
+            self._stop.wait(delay)
+            delay = min(delay * 2, RETRY_MAX)
+
+    def close(self, drain_timeout=5.0):
+        """Spool any partial batch and give the sender a moment to deliver it"""
+        self.flush()
+        deadline = time.monotonic() + drain_timeout
+        while self.pending_batches and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=self.timeout)
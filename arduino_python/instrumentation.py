@@ -0,0 +1,142 @@
+import cProfile
+import contextlib
+import io
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+# Returned by stage() while disabled; entering it costs one attribute lookup
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class _Stage:
+    __slots__ = ('timers', 'name', 'started')
+
+    def __init__(self, timers, name):
+        self.timers = timers
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timers._add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Instrumentation:
+    """Opt-in stage timers, counters and on-demand profiles for a dashboard loop.
+
+    Wrap each step of a loop pass in ``with timers.stage('name'):`` and
+    call ``end_pass()`` once per pass. While ``enabled`` is False,
+    ``stage()`` hands back a shared no-op context and ``count()`` returns
+    at once, so the hooks can stay in the hot path. The last ``window``
+    durations of each stage are kept for percentiles.
+
+    ``start_profile(passes)`` runs cProfile over the next ``passes`` loop
+    passes; the report is then in ``profile_report``. ``memory_snapshot()``
+    returns the top allocation sites from tracemalloc and, from the
+    second call on, the growth since the previous snapshot.
+    """
+
+    def __init__(self, enabled=False, window=500):
+        self.enabled = enabled
+        self.window = window
+        self.passes = 0
+        self.counters = defaultdict(int)
+        self.durations = defaultdict(lambda: deque(maxlen=self.window))
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+
+        self.profile_report = None
+        self._profiler = None
+        self._profile_passes = 0
+        self._snapshot = None
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def _add(self, name, seconds):
+        self.durations[name].append(seconds)
+        self.totals[name] += seconds
+        self.calls[name] += 1
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def end_pass(self):
+        if self._profiler is not None:
+            self._profile_passes -= 1
+            if self._profile_passes <= 0:
+                self.stop_profile()
+        if self.enabled:
+            self.passes += 1
+
+    def reset(self):
+        self.passes = 0
+        self.counters.clear()
+        self.durations.clear()
+        self.totals.clear()
+        self.calls.clear()
+
+    def summary(self):
+        """One row per stage: calls, mean/p50/p99/max in ms and share of timed time"""
+        import numpy as np
+
+        timed = sum(self.totals.values()) or 1.0
+        rows = []
+        for name, values in self.durations.items():
+            recent = np.asarray(values) * 1000
+            rows.append({
+                'stage': name,
+                'calls': self.calls[name],
+                'mean_ms': self.totals[name] * 1000 / self.calls[name],
+                'p50_ms': float(np.percentile(recent, 50)),
+                'p99_ms': float(np.percentile(recent, 99)),
+                'max_ms': float(recent.max()),
+                'share_%': 100 * self.totals[name] / timed
+            })
+        return sorted(rows, key=lambda row: row['share_%'], reverse=True)
+
+    def start_profile(self, passes=100):
+        """Profile the next ``passes`` loop passes with cProfile"""
+        if self._profiler is not None:
+            return
+        self.profile_report = None
+        self._profile_passes = passes
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    @property
+    def profiling(self):
+        return self._profiler is not None
+
+    def stop_profile(self, limit=30):
+        if self._profiler is None:
+            return self.profile_report
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+        self._profiler = None
+        self.profile_report = out.getvalue()
+        return self.profile_report
+
+    def memory_snapshot(self, limit=15):
+        """Top allocation sites as text; tracing starts on the first call"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            return 'tracemalloc started; take another snapshot to see allocations'
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f'Traced memory: {current / 1024:,.0f} KiB (peak {peak / 1024:,.0f} KiB)', '']
+        lines += [str(stat) for stat in snapshot.statistics('lineno')[:limit]]
+        if self._snapshot is not None:
+            lines += ['', 'Growth since previous snapshot:']
+            lines += [str(stat) for stat in snapshot.compare_to(self._snapshot, 'lineno')[:limit]]
+        self._snapshot = snapshot
+        return '\n'.join(lines)
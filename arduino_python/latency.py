@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from collections import deque
+
+# Stage intervals, each ending at the named stamp
+STAGES = ('parsed', 'buffered', 'rendered', 'total')
+
+
+class LatencyTracker:
+    """End-to-end latency of readings, from serial arrival to render.
+
+    The reader calls ``record()`` with three ``time.monotonic()`` stamps
+    per reading: when its line came off the port, when it was parsed and
+    when it was in the plot buffers. The dashboard calls ``rendered()``
+    right after it has pushed a frame to the page, which closes every
+    reading recorded since the previous render. Durations are kept in
+    seconds, per stage, in bounded ring buffers; readings flagged as
+    alarms are also tracked on their own against ``sla`` seconds.
+
+    The render stamp is when Streamlit accepted the update, so browser
+    paint time is not included.
+    """
+
+    def __init__(self, max_samples=5000, sla=2.0):
+        self.sla = sla
+        self.samples = {stage: deque(maxlen=max_samples) for stage in STAGES}
+        self.alarm_samples = deque(maxlen=max_samples)
+        self._pending = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, arrival, parsed, buffered, alarm=False):
+        with self._lock:
+            self._pending.append((arrival, parsed, buffered, alarm))
+
+    def rendered(self, now=None):
+        """Close every pending reading at render time ``now``; returns how many"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+            for arrival, parsed, buffered, alarm in pending:
+                self.samples['parsed'].append(parsed - arrival)
+                self.samples['buffered'].append(buffered - parsed)
+                self.samples['rendered'].append(now - buffered)
+                self.samples['total'].append(now - arrival)
+                if alarm:
+                    self.alarm_samples.append(now - arrival)
+        return len(pending)
+
+    def summary(self):
+        """Count, p50, p99 and max in milliseconds per stage, plus the alarm SLA"""
+        with self._lock:
+            stages = {stage: _stats(values) for stage, values in self.samples.items()}
+            alarms = _stats(self.alarm_samples)
+        alarms['sla_ms'] = self.sla * 1000
+        alarms['sla_met'] = alarms['count'] == 0 or alarms['max_ms'] <= self.sla * 1000
+        return {'stages': stages, 'alarms': alarms}
+
+    def histogram_figure(self, stage='total'):
+        """Plotly histogram of one stage's latency in milliseconds"""
+        import numpy as np
+        import plotly.graph_objects as go
+
+        with self._lock:
+            values = np.asarray(self.samples[stage]) * 1000
+            alarms = np.asarray(self.alarm_samples) * 1000
+        fig = go.Figure()
+        fig.add_trace(go.Histogram(x=values, name='All readings', nbinsx=50))
+        if stage == 'total' and len(alarms):
+            fig.add_trace(go.Histogram(x=alarms, name='Alarm readings', nbinsx=50))
+            fig.add_vline(x=self.sla * 1000, line_dash='dash', line_color='red',
+                          annotation_text='SLA')
+        fig.update_layout(height=300, barmode='overlay', margin=dict(t=30, b=30),
+                          xaxis_title='Latency (ms)', yaxis_title='Readings')
+        fig.update_traces(opacity=0.75)
+        return fig
+
+    def export(self, path):
+        """Write the summary and raw samples (seconds) as JSON"""
+        with self._lock:
+            samples = {stage: list(values) for stage, values in self.samples.items()}
+            samples['alarm_total'] = list(self.alarm_samples)
+        with open(path, 'w') as f:
+            json.dump({'summary': self.summary(), 'samples': samples}, f)
+
+
+def _stats(values):
+    import numpy as np
+
+    if not len(values):
+        return {'count': 0, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+    values = np.asarray(values) * 1000
+    return {
+        'count': len(values),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max())
+    }
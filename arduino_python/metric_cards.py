@@ -0,0 +1,73 @@
+import math
+
+import streamlit as st
+
+# (key, label, unit, trend deadband): a trend shows once the recent mean
+# moves more than the deadband, so sensor noise does not flip the arrow
+METRICS = (
+    ('co2', 'CO2', 'ppm', 5.0),
+    ('temp_in', 'Indoor Temperature', '°C', 0.2),
+    ('temp_out', 'Outdoor Temperature', '°C', 0.2),
+    ('hum_in', 'Indoor Humidity', '%', 1.0),
+    ('hum_out', 'Outdoor Humidity', '%', 1.0),
+)
+TREND_ARROWS = {1: '▲', -1: '▼', 0: ''}
+
+CARD_HTML = """
+    <div class="metric-box">
+        <div class="metric-label">{label}</div>
+        <div class="metric-value">{value} <span class="metric-trend">{trend}</span></div>
+        <div class="metric-label">{unit}</div>
+    </div>
+"""
+
+
+def trend(values, window=30, deadband=0.0):
+    """1 rising, -1 falling, 0 steady: newer against older half of the last ``window`` readings"""
+    recent = [value for value in values[-window:] if not math.isnan(value)]
+    half = len(recent) // 2
+    if half == 0:
+        return 0
+    change = sum(recent[-half:]) / half - sum(recent[:half]) / half
+    if change > deadband:
+        return 1
+    if change < -deadband:
+        return -1
+    return 0
+
+
+class MetricRow:
+    """A row of metric cards that redraws a card only when its text changes.
+
+    Each pass hands over the latest values (and, for trend arrows, the
+    plot buffers); a card whose rounded value and arrow match what is on
+    screen is skipped, so an unchanged card costs no websocket message
+    or DOM update however often the dashboard loop runs.
+    """
+
+    def __init__(self, metrics=METRICS, trends=True, trend_window=30):
+        self.metrics = metrics
+        self.trends = trends
+        self.trend_window = trend_window
+        self.placeholders = [column.empty() for column in st.columns(len(metrics))]
+        self.shown = [None] * len(metrics)
+        self.updates = 0
+
+    def update(self, latest_values, buffers=None):
+        """Redraw the cards that changed; returns how many were redrawn"""
+        redrawn = 0
+        for i, (key, label, unit, deadband) in enumerate(self.metrics):
+            value = f'{latest_values[key]:.1f}'
+            direction = 0
+            if self.trends and buffers is not None:
+                direction = trend(buffers[key], self.trend_window, deadband)
+            if self.shown[i] == (value, direction):
+                continue
+            self.shown[i] = (value, direction)
+            self.placeholders[i].markdown(
+                CARD_HTML.format(label=label, value=value, trend=TREND_ARROWS[direction],
+                                 unit=unit),
+                unsafe_allow_html=True)
+            redrawn += 1
+        self.updates += redrawn
+        return redrawn
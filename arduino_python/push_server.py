@@ -0,0 +1,181 @@
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+
+PAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'live.html')
+SSE_HEADERS = (b'HTTP/1.1 200 OK\r\n'
+               b'Content-Type: text/event-stream\r\n'
+               b'Cache-Control: no-cache\r\n'
+               b'Connection: keep-alive\r\n'
+               b'Access-Control-Allow-Origin: *\r\n\r\n')
+
+
+def compact_frame(timestamp, values, device_id=None):
+    """Collector frame -> {'t': epoch ms, 'd': device, <channel>: value, ...}"""
+    message = {'t': int(timestamp.timestamp() * 1000)}
+    if device_id is not None:
+        message['d'] = device_id
+    message.update(values)
+    return message
+
+
+class PushHub:
+    """Fan records out to Server-Sent Events subscribers.
+
+    Each record is encoded once, as a complete SSE event with an id, and
+    the same bytes are queued for every subscriber, so a viewer costs a
+    queue put and a socket write per record. The last ``backlog`` events
+    are kept for new viewers and for resuming via ``Last-Event-ID``. A
+    viewer whose queue fills up is too slow and is disconnected instead of
+    holding memory for it.
+    """
+
+    def __init__(self, backlog=600, max_queue=256):
+        self.backlog = deque(maxlen=backlog)
+        self.max_queue = max_queue
+        self.subscribers = set()
+        self.next_id = 0
+        self.dropped_viewers = 0
+
+    def publish(self, message):
+        # NaN readings are not valid JSON; send them as null
+        message = {key: None if value != value else value for key, value in message.items()}
+        payload = json.dumps(message, separators=(',', ':'))
+        event = f'id: {self.next_id}\ndata: {payload}\n\n'.encode('utf-8')
+        self.backlog.append((self.next_id, event))
+        self.next_id += 1
+        for queue in list(self.subscribers):
+            if queue.full():
+                self.unsubscribe(queue)
+                self.dropped_viewers += 1
+                # Wake the viewer's task so it closes the connection
+                queue.get_nowait()
+                queue.put_nowait(None)
+            else:
+                queue.put_nowait(event)
+
+    def subscribe(self, last_id=None):
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        for event_id, event in self.backlog:
+            if last_id is None or event_id > last_id:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(event)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+
+async def _read_request(reader):
+    """(method, path, headers) of an HTTP request, or None on a bad request"""
+    request_line = await reader.readline()
+    parts = request_line.decode('latin-1').split()
+    if len(parts) < 2:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], headers
+
+
+def _response(status, content_type, body):
+    return (f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n').encode() + body
+
+
+class PushServer:
+    """Serve the live page and the /events SSE stream from one asyncio loop"""
+
+    def __init__(self, hub, host='0.0.0.0', port=8502, keepalive=15.0):
+        self.hub = hub
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        with open(PAGE_PATH, 'rb') as f:
+            self.page = f.read()
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port,
+                                                 backlog=1024)
+        return self
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await _read_request(reader)
+            if request is None:
+                writer.write(_response('400 Bad Request', 'text/plain', b'Bad request'))
+            elif request[0] != 'GET':
+                writer.write(_response('405 Method Not Allowed', 'text/plain', b'GET only'))
+            elif request[1].split('?')[0] == '/events':
+                await self._stream(writer, request[2].get('last-event-id'))
+            elif request[1].split('?')[0] in ('/', '/index.html'):
+                writer.write(_response('200 OK', 'text/html; charset=utf-8', self.page))
+            else:
+                writer.write(_response('404 Not Found', 'text/plain', b'Not found'))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer, last_event_id):
+        last_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+        queue = self.hub.subscribe(last_id)
+        try:
+            writer.write(SSE_HEADERS + b'retry: 2000\n\n')
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    # A comment line keeps proxies from closing an idle stream
+                    event = b': keepalive\n\n'
+                if event is None:
+                    return
+                writer.write(event)
+                await writer.drain()
+        finally:
+            self.hub.unsubscribe(queue)
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+
+class PushFeed:
+    """Collector history store that pushes every frame to live viewers.
+
+    Add it to a collector's ``history`` next to ParquetCapture or
+    FleetShipper. The collector that already reads the port (the Streamlit
+    dashboard's, or ``collector.py --push-port``) feeds it, so browsers
+    watch the same Arduino without a second reader on the serial port.
+    The live page and ``/events`` are served by an asyncio loop on a
+    background thread. The server outlives port outages: the collector's
+    gap frame goes out as nulls and readings resume once it reconnects.
+    One feed can be shared by every collector in the process, so it has no
+    ``close()``; it stops with the process.
+    """
+
+    def __init__(self, host='0.0.0.0', port=8502, device_id=None):
+        self.device_id = device_id
+        self.hub = PushHub()
+        self.server = PushServer(self.hub, host, port)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='push-server',
+                                        daemon=True)
+        self._thread.start()
+        # Raises here if the HTTP port is taken
+        asyncio.run_coroutine_threadsafe(self.server.start(), self._loop).result()
+
+    def append(self, timestamp, values):
+        """Publish one frame; same signature as CompactHistory.append"""
+        message = compact_frame(timestamp, values, self.device_id)
+        self._loop.call_soon_threadsafe(self.hub.publish, message)
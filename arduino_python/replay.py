@@ -0,0 +1,220 @@
+import argparse
+import csv
+import os
+import random
+import re
+import threading
+import time
+import tty
+from datetime import datetime
+
+# Seconds between firmware frames (the sketch's delay(1000))
+FRAME_PERIOD = 1.0
+# A reading: the number after a label's colon (not the 2 of "CO2")
+READING = re.compile(r'(: *)-?\d+(?:\.\d+)?')
+
+
+def format_env(sensor, humidity, temperature):
+    """One DHT line exactly as the firmware prints it"""
+    label = 'IN' if sensor == 'IN' else 'out'
+    return (f'Humidity {label}: {humidity:.2f} %\t'
+            f'Temperature {label}: {temperature:.2f} *C')
+
+
+def format_co2(value):
+    return f'CO2: {value:.2f}  ppm'
+
+
+def load_data_txt(path, period=FRAME_PERIOD):
+    """(seconds, line) events from a Data.txt serial log, one frame per ``period``"""
+    events = []
+    frame = -1
+    with open(path, encoding='latin-1') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            # Each frame starts with the outdoor DHT line; an alarm line closes it
+            if line.startswith('Humidity out') or frame < 0:
+                frame += 1
+            events.append((frame * period, line))
+    return events
+
+
+def load_capture_csv(path):
+    """(seconds, line) events from an arduino_data.csv capture, keeping its timing"""
+    events = []
+    start = None
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            timestamp = datetime.fromisoformat(row['timestamp'])
+            start = start or timestamp
+            if row['sensor'] == 'CO2':
+                line = format_co2(float(row['value']))
+            else:
+                line = format_env(row['sensor'], float(row['humidity']),
+                                  float(row['temperature']))
+            events.append(((timestamp - start).total_seconds(), line))
+    return events
+
+
+def load_events(path):
+    if path.endswith('.csv'):
+        return load_capture_csv(path)
+    return load_data_txt(path)
+
+
+class FaultInjector:
+    """Corrupt a replayed event stream the way a flaky link or sensor would.
+
+    Each rate is the per-line probability of a fault: ``truncate`` cuts a
+    line short, ``nan`` replaces its readings with ``nan`` (a DHT read
+    failure), ``drop`` loses it, and ``burst`` releases it together with
+    the next ``burst_size`` lines at once. Faults are drawn from a seeded
+    generator, so a run is reproducible. ``counts`` tallies what was
+    injected.
+    """
+
+    def __init__(self, truncate=0.0, nan=0.0, drop=0.0, burst=0.0, burst_size=10,
+                 seed=None):
+        self.truncate = truncate
+        self.nan = nan
+        self.drop = drop
+        self.burst = burst
+        self.burst_size = burst_size
+        self.random = random.Random(seed)
+        self.counts = {'truncate': 0, 'nan': 0, 'drop': 0, 'burst': 0}
+
+    def apply(self, events):
+        burst_left = 0
+        burst_time = 0.0
+        for seconds, line in events:
+            if self.random.random() < self.drop:
+                self.counts['drop'] += 1
+                continue
+            if self.random.random() < self.nan:
+                line = READING.sub(r'\1nan', line)
+                self.counts['nan'] += 1
+            if self.random.random() < self.truncate:
+                line = line[:self.random.randrange(len(line))]
+                self.counts['truncate'] += 1
+            if burst_left:
+                burst_left -= 1
+                seconds = burst_time
+            elif self.random.random() < self.burst:
+                burst_left = self.burst_size
+                burst_time = seconds
+                self.counts['burst'] += 1
+            yield seconds, line
+
+
+class SerialReplay:
+    """Play captured sensor lines into a pseudo-terminal.
+
+    ``port`` is the slave side of a pty, which pyserial opens like a real
+    device, so ``SensorDataCollector(port=replay.port)`` and the
+    dashboards (via ``SENSOR_PORT``) run unchanged. ``speed`` scales the
+    capture's timing (1 = real time, 100 = a hundred times faster);
+    ``None`` writes as fast as the reader drains the pty.
+    """
+
+    def __init__(self, events, speed=1.0, loop=False, faults=None, line_ending='\r\n'):
+        self.events = list(events)
+        self.speed = speed
+        self.loop = loop
+        self.faults = faults
+        self.line_ending = line_ending
+        self.lines_sent = 0
+        self.bytes_sent = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+
+    def _stream(self):
+        while True:
+            events = self.events
+            if self.faults is not None:
+                events = self.faults.apply(events)
+            yield from events
+            if not self.loop:
+                return
+
+    def run(self):
+        """Write every event, pacing by its timestamp; blocks until done or stopped"""
+        started = time.monotonic()
+        offset = 0.0
+        previous = 0.0
+        for seconds, line in self._stream():
+            if self._stop.is_set():
+                break
+            if seconds < previous:
+                # Looping back to the start: continue the timeline
+                offset += previous + FRAME_PERIOD
+            previous = seconds
+            if self.speed:
+                delay = started + (offset + seconds) / self.speed - time.monotonic()
+                if delay > 0 and self._stop.wait(delay):
+                    break
+            data = (line + self.line_ending).encode('utf-8')
+            os.write(self.master, data)
+            self.lines_sent += 1
+            self.bytes_sent += len(data)
+
+    def start(self):
+        """Replay on a background thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='serial-replay', daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            # A write blocked on a full pty only returns once the reader drains it
+            self._thread.join(timeout=1)
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a sensor capture over a virtual serial port')
+    parser.add_argument('capture', help='Data.txt log or arduino_data.csv capture')
+    parser.add_argument('--speed', default='1',
+                        help="playback speed multiplier, or 'max' for no pacing")
+    parser.add_argument('--loop', action='store_true')
+    parser.add_argument('--truncate', type=float, default=0.0)
+    parser.add_argument('--nan', type=float, default=0.0)
+    parser.add_argument('--drop', type=float, default=0.0)
+    parser.add_argument('--burst', type=float, default=0.0)
+    parser.add_argument('--burst-size', type=int, default=10)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    faults = None
+    if args.truncate or args.nan or args.drop or args.burst:
+        faults = FaultInjector(args.truncate, args.nan, args.drop, args.burst,
+                               args.burst_size, args.seed)
+    speed = None if args.speed == 'max' else float(args.speed)
+    replay = SerialReplay(load_events(args.capture), speed=speed, loop=args.loop,
+                          faults=faults)
+    print(f'Replaying on {replay.port}  (e.g. SENSOR_PORT={replay.port} streamlit run sensors.py)')
+    try:
+        replay.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f'Sent {replay.lines_sent} lines')
+        if faults is not None:
+            print(f'Injected faults: {faults.counts}')
+        replay.close()
+
+
+if __name__ == '__main__':
+    main()
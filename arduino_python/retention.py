@@ -0,0 +1,115 @@
+import math
+from collections import deque
+from datetime import datetime
+
+CHANNELS = ('co2', 'temp_in', 'temp_out', 'hum_in', 'hum_out')
+
+# (bucket seconds, rows kept); the first tier is raw frames, so its seconds are unused.
+# At 1 frame/s: 10 min raw, then 1 h of 10 s buckets, then 12 h of 1 min buckets
+DEFAULT_TIERS = ((0, 600), (10, 360), (60, 720))
+
+
+class _Tier:
+    __slots__ = ('seconds', 'timestamps', 'counts', 'values', 'open_bucket', 'open_start',
+                 'open_count', 'open_sums', 'open_valid')
+
+    def __init__(self, seconds, capacity):
+        self.seconds = seconds
+        self.timestamps = deque(maxlen=capacity)
+        self.counts = deque(maxlen=capacity)
+        self.values = {name: deque(maxlen=capacity) for name in CHANNELS}
+        self.open_bucket = None
+
+    @property
+    def full(self):
+        return len(self.timestamps) == self.timestamps.maxlen
+
+    def oldest(self):
+        values = {name: column[0] for name, column in self.values.items()}
+        return self.timestamps[0], self.counts[0], values
+
+    def push(self, timestamp, count, values):
+        self.timestamps.append(timestamp)
+        self.counts.append(count)
+        for name, column in self.values.items():
+            column.append(values.get(name, math.nan))
+
+    def open(self, bucket, timestamp):
+        self.open_bucket = bucket
+        self.open_start = timestamp
+        self.open_count = 0
+        self.open_sums = dict.fromkeys(CHANNELS, 0.0)
+        self.open_valid = dict.fromkeys(CHANNELS, 0)
+
+    def accumulate(self, count, values):
+        self.open_count += count
+        for name in CHANNELS:
+            value = values.get(name)
+            if value is not None and value == value:
+                self.open_sums[name] += value * count
+                self.open_valid[name] += count
+
+    def open_means(self):
+        return {name: self.open_sums[name] / self.open_valid[name]
+                if self.open_valid[name] else math.nan for name in CHANNELS}
+
+
+class TieredRetention:
+    """Live history at full resolution for recent frames, coarser further back.
+
+    The first tier keeps raw frames; each later tier keeps time buckets
+    of ``seconds`` holding the count-weighted mean of what fell out of
+    the tier before it. Every tier is a bounded deque, so memory and the
+    cost of ``to_plot_data()`` stay fixed however long the shift runs.
+    NaN readings (sensor failures, reconnect gaps) are left out of the
+    means; a bucket with no valid reading stays NaN.
+
+    Plugs into ``SensorDataCollector(retention=...)``, which appends one
+    frame per CO2 line like the ``history`` stores.
+    """
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tiers = [_Tier(seconds, capacity) for seconds, capacity in tiers]
+
+    @property
+    def capacity(self):
+        return sum(tier.timestamps.maxlen for tier in self.tiers)
+
+    def append(self, timestamp, values):
+        """Add one frame; ``values`` maps channel name to reading"""
+        self._insert(0, timestamp, 1, values)
+
+    def _insert(self, level, timestamp, count, values):
+        tier = self.tiers[level]
+        evicted = tier.oldest() if tier.full else None
+        tier.push(timestamp, count, values)
+        if evicted is not None:
+            self._fold(level + 1, *evicted)
+
+    def _fold(self, level, timestamp, count, values):
+        """Add an evicted row to ``level``'s open bucket, closing it on a new bucket"""
+        if level >= len(self.tiers):
+            return
+        tier = self.tiers[level]
+        bucket = int(timestamp.timestamp() // tier.seconds)
+        if tier.open_bucket != bucket:
+            if tier.open_bucket is not None and tier.open_count:
+                self._insert(level, tier.open_start, tier.open_count, tier.open_means())
+            tier.open(bucket, datetime.fromtimestamp(bucket * tier.seconds))
+        tier.accumulate(count, values)
+
+    def to_plot_data(self):
+        """All retained data, oldest first, in ``get_data_for_plots()`` format"""
+        data = {'timestamps': []}
+        data.update({name: [] for name in CHANNELS})
+        for tier in reversed(self.tiers):
+            data['timestamps'].extend(tier.timestamps)
+            for name in CHANNELS:
+                data[name].extend(tier.values[name])
+            # Rows folded in but not yet closed into a bucket
+            if tier.open_bucket is not None and tier.open_count:
+                data['timestamps'].append(tier.open_start)
+                means = tier.open_means()
+                for name in CHANNELS:
+                    data[name].append(means[name])
+        return data
@@ -1,142 +1,59 @@
+import os
 import streamlit as st
-import serial
 import time
-import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime
-import numpy as np
-from collections import deque
+import weakref
 
-class SensorDataCollector:
-    def __init__(self, port='COM11', baudrate=9600, max_points=100):
-        self.serial_port = serial.Serial(port=port, baudrate=baudrate, timeout=1)
-        self.max_points = max_points
-        
-        # Initialize deques for storing data
-        self.timestamps = deque(maxlen=max_points)
-        self.co2_values = deque(maxlen=max_points)
-        self.temp_in_values = deque(maxlen=max_points)
-        self.temp_out_values = deque(maxlen=max_points)
-        self.hum_in_values = deque(maxlen=max_points)
-        self.hum_out_values = deque(maxlen=max_points)
-        
-        # Store latest values for metrics
-        self.latest_values = {
-            'co2': 0,
-            'temp_in': 0,
-            'temp_out': 0,
-            'hum_in': 0,
-            'hum_out': 0
-        }
-
-    def parse_line(self, line):
-        """Parse a single line of sensor data"""
-        try:
-            if "Humidity" in line:
-                parts = line.split(':')
-                sensor_type = 'IN' if 'IN' in parts[0] else 'OUT'
-                
-                humidity_part = parts[1].split('%')[0].strip()
-                humidity = float(humidity_part)
-                
-                temp_part = parts[2].split('*')[0].strip()
-                temperature = float(temp_part)
-                
-                return {
-                    'type': 'env',
-                    'sensor': sensor_type,
-                    'humidity': humidity,
-                    'temperature': temperature
-                }
-            elif "CO2" in line:
-                co2_value = float(line.split(':')[1].split('ppm')[0].strip())
-                return {
-                    'type': 'co2',
-                    'value': co2_value
-                }
-        except Exception as e:
-            return None
-
-    def read_data(self):
-        """Read a single data point from serial port"""
-        if self.serial_port.in_waiting:
-            try:
-                line = self.serial_port.readline().decode('utf-8').strip()
-                if line:
-                    data = self.parse_line(line)
-                    if data:
-                        current_time = datetime.now()
-                        self.timestamps.append(current_time)
-                        
-                        if data['type'] == 'co2':
-                            self.co2_values.append(data['value'])
-                            self.latest_values['co2'] = data['value']
-                        elif data['type'] == 'env':
-                            if data['sensor'] == 'IN':
-                                self.temp_in_values.append(data['temperature'])
-                                self.hum_in_values.append(data['humidity'])
-                                self.latest_values['temp_in'] = data['temperature']
-                                self.latest_values['hum_in'] = data['humidity']
-                            else:
-                                self.temp_out_values.append(data['temperature'])
-                                self.hum_out_values.append(data['humidity'])
-                                self.latest_values['temp_out'] = data['temperature']
-                                self.latest_values['hum_out'] = data['humidity']
-                        return True
-            except Exception as e:
-                pass
-        return False
-
-    def get_data_for_plots(self):
-        """Get current data in format suitable for plotting"""
-        return {
-            'timestamps': list(self.timestamps),
-            'co2': list(self.co2_values),
-            'temp_in': list(self.temp_in_values),
-            'temp_out': list(self.temp_out_values),
-            'hum_in': list(self.hum_in_values),
-            'hum_out': list(self.hum_out_values)
-        }
-
-    def close(self):
-        """Close the serial connection"""
-        if self.serial_port and self.serial_port.is_open:
-            self.serial_port.close()
+from capture import ParquetCapture
+# The collector lives in collector.py so headless use skips streamlit and plotly
+from collector import (CO2_ALARM_PPM, SensorDataCollector, classify_line,  # noqa: F401
+                       data_mark, parse_line)
+from instrumentation import Instrumentation
+from metric_cards import MetricRow
+from resample import align_channels
+from retention import TieredRetention
 
 def create_figures(data):
     """Create plotly figures for the dashboard"""
+    # plotly takes about a second to import, so load it on first draw
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    from chart_arrays import epoch_ms, float32
+    
+    # Typed arrays are sent base64-encoded rather than number by number
+    x = epoch_ms(data['timestamps'])
+    
     fig = make_subplots(rows=3, cols=1,
                        subplot_titles=('CO2 Levels', 'Temperature', 'Humidity'),
                        vertical_spacing=0.1)
     
     # Add CO2 trace
     fig.add_trace(
-        go.Scatter(x=data['timestamps'], y=data['co2'],
+        go.Scatter(x=x, y=float32(data['co2']),
                   name="CO2", line=dict(color='blue')),
         row=1, col=1
     )
     
     # Add temperature traces
     fig.add_trace(
-        go.Scatter(x=data['timestamps'], y=data['temp_in'],
+        go.Scatter(x=x, y=float32(data['temp_in']),
                   name="Temperature IN", line=dict(color='red')),
         row=2, col=1
     )
     fig.add_trace(
-        go.Scatter(x=data['timestamps'], y=data['temp_out'],
+        go.Scatter(x=x, y=float32(data['temp_out']),
                   name="Temperature OUT", line=dict(color='green')),
         row=2, col=1
     )
     
     # Add humidity traces
     fig.add_trace(
-        go.Scatter(x=data['timestamps'], y=data['hum_in'],
+        go.Scatter(x=x, y=float32(data['hum_in']),
                   name="Humidity IN", line=dict(color='red')),
         row=3, col=1
     )
     fig.add_trace(
-        go.Scatter(x=data['timestamps'], y=data['hum_out'],
+        go.Scatter(x=x, y=float32(data['hum_out']),
                   name="Humidity OUT", line=dict(color='green')),
         row=3, col=1
     )
@@ -148,6 +65,9 @@ def create_figures(data):
         margin=dict(t=100)  # Add more top margin for metrics
     )
     
+    # Numeric x values are epoch milliseconds
+    fig.update_xaxes(type='date')
+    
     # Update axes labels
     fig.update_yaxes(title_text="PPM", row=1, col=1)
     fig.update_yaxes(title_text="Temperature (°C)", row=2, col=1)
@@ -165,6 +85,91 @@ def create_figures(data):
     
     return fig
 
+class SessionCloser:
+    """Closes a session's collector or manager once Streamlit drops the session.
+
+    With fast reruns every widget change stops the running script just as
+    the end of the session does, so the script cannot close its readers
+    itself. This object is kept in session state; when the state is
+    discarded, or the server exits, its finalizer closes the reader.
+    """
+
+    def __init__(self, reader):
+        self.close = weakref.finalize(self, reader.close)
+
+def keep_for_session(key, reader):
+    """Store ``reader`` in session state, to be closed with the session"""
+    st.session_state[key] = reader
+    st.session_state[key + '_closer'] = SessionCloser(reader)
+
+def close_session_readers():
+    """Close the session's collector or manager now; the next run opens fresh ones"""
+    for key in ('collector', 'manager'):
+        if key in st.session_state:
+            st.session_state[key + '_closer'].close()
+            del st.session_state[key]
+            del st.session_state[key + '_closer']
+
+@st.cache_resource
+def push_feed(port):
+    """One SSE push server per process, fed by the session collectors"""
+    from push_server import PushFeed
+    return PushFeed(port=port)
+
+def connection_status(collector):
+    """Warning text while the collector's port is down, else None"""
+    if collector.connected or not collector.outages:
+        return None
+    lost_at = collector.outages[-1][0]
+    return (f"Serial port {collector.port} lost at {lost_at:%H:%M:%S}; "
+            f"reconnecting (attempt {collector.reconnect_attempts + 1})")
+
+def grid_options():
+    """How live charts put the channels on one regular grid, from the environment
+
+    SENSORS_GRID is the bin width in seconds (the firmware sends a frame
+    about every second). Runs of up to SENSORS_FILL_LIMIT empty bins, e.g.
+    from a frame arriving late, are filled by SENSORS_FILL (linear, ffill
+    or none); longer outages stay as breaks in the lines.
+    """
+    return {'period': float(os.environ.get('SENSORS_GRID', '1')),
+            'fill': os.environ.get('SENSORS_FILL', 'linear'),
+            'limit': int(os.environ.get('SENSORS_FILL_LIMIT', '2'))}
+
+def show_comparison(manager, grid):
+    """Side-by-side live view of every showcase handled by the manager"""
+    device_ids = list(manager.collectors)
+    columns = st.columns(len(device_ids))
+    summary_placeholders = []
+    chart_placeholders = []
+    for column, device_id in zip(columns, device_ids):
+        column.subheader(device_id)
+        summary_placeholders.append(column.empty())
+        chart_placeholders.append(column.empty())
+    shown_marks = [None] * len(device_ids)
+    
+    while True:
+        for i, device_id in enumerate(device_ids):
+            plot_data, latest_values = manager.snapshot(device_id)
+            status = connection_status(manager.collectors[device_id])
+            summary_placeholders[i].markdown(
+                (f"⚠️ {status}\n\n" if status else "") +
+                f"**CO2** {latest_values['co2']:.1f} ppm · "
+                f"**In** {latest_values['temp_in']:.1f} °C / {latest_values['hum_in']:.1f} % · "
+                f"**Out** {latest_values['temp_out']:.1f} °C / {latest_values['hum_out']:.1f} %"
+            )
+            # A device with nothing new (e.g. while its port is down) keeps its chart
+            if data_mark(plot_data) == shown_marks[i]:
+                continue
+            shown_marks[i] = data_mark(plot_data)
+            aligned = align_channels(manager.channel_series(device_id), **grid)
+            chart_placeholders[i].plotly_chart(create_figures(aligned),
+                                               use_container_width=True)
+            manager.collectors[device_id].latency.rendered()
+        
+        # Comparison charts are heavier, so refresh them less often
+        time.sleep(0.5)
+
 def main():
     # Set dark theme
     st.set_page_config(
@@ -203,6 +208,10 @@ def main():
             font-size: 16px;
             color: #D1D5DB;  /* Light grey for labels */
         }
+        .metric-trend {
+            font-size: 20px;
+            color: #E6E6E6;
+        }
         
         /* Alarm box in dark theme */
         .alarm-box {
@@ -247,81 +256,210 @@ def main():
     
     # Create placeholder for CO2 alarm
     alarm_placeholder = st.empty()
+    connection_placeholder = st.empty()
     
-    # Initialize session state
-    if 'collector' not in st.session_state:
-        st.session_state.collector = SensorDataCollector(port='COM11', baudrate=9600)
+    # SENSORS_CAPTURE=capture_%Y%m%d.parquet records every frame to Parquet
+    capture_path = os.environ.get('SENSORS_CAPTURE')
     
-    # Create columns for metrics
-    cols = st.columns(5)
-    
-    # Create placeholder HTML for each metric
-    metric_html = """
-        <div class="metric-box">
-            <div class="metric-label">{label}</div>
-            <div class="metric-value">{value}</div>
-            <div class="metric-label">{unit}</div>
-        </div>
-    """
+    # SENSOR_DEVICES=showcase1=COM11,showcase2=COM12 watches several showcases
+    from collector_manager import CollectorManager, parse_devices
+    devices = parse_devices(os.environ.get('SENSOR_DEVICES', ''))
+    manager = None
+    selected_device = None
     
-    metrics_config = [
-        {"label": "CO2", "key": "co2", "unit": "ppm"},
-        {"label": "Indoor Temperature", "key": "temp_in", "unit": "°C"},
-        {"label": "Outdoor Temperature", "key": "temp_out", "unit": "°C"},
-        {"label": "Indoor Humidity", "key": "hum_in", "unit": "%"},
-        {"label": "Outdoor Humidity", "key": "hum_out", "unit": "%"}
-    ]
+    # Initialize session state
+    if devices:
+        if 'manager' not in st.session_state:
+            def device_capture(device_id):
+                if not capture_path:
+                    return None
+                folder, name = os.path.split(capture_path)
+                return ParquetCapture(os.path.join(folder, f"{device_id}_{name}"))
+            
+            keep_for_session('manager', CollectorManager(
+                devices, baudrate=9600, history_factory=device_capture,
+                protocol=os.environ.get('SENSOR_PROTOCOL', 'text')))
+            st.session_state.manager.start()
+        manager = st.session_state.manager
+        selected_device = st.selectbox("Showcase", list(devices) + ["Compare all"])
+        if selected_device == "Compare all":
+            show_comparison(manager, grid_options())
+            return
+    elif 'collector' not in st.session_state:
+        history = [ParquetCapture(capture_path)] if capture_path else []
+        # SENSORS_FLEET_URL=http://aggregator:8765/ingest also reports to the fleet aggregator
+        fleet_url = os.environ.get('SENSORS_FLEET_URL')
+        if fleet_url:
+            from fleet import FleetShipper
+            history.append(FleetShipper(fleet_url, os.environ.get('SENSORS_FLEET_ID', 'showcase'),
+                                        os.environ.get('SENSORS_FLEET_SPOOL', 'fleet_spool')))
+        # SENSORS_PUSH_PORT=8502 also pushes each frame to live.html viewers over SSE
+        push_port = os.environ.get('SENSORS_PUSH_PORT')
+        if push_port:
+            history.append(push_feed(int(push_port)))
+        # Kept open across reruns (chart range, showcase, diagnostics widgets);
+        # SENSOR_PROTOCOL=binary reads the firmware's BINARY_FRAMES output
+        keep_for_session('collector', SensorDataCollector(
+            port=os.environ.get('SENSOR_PORT', 'COM11'), baudrate=9600, history=history,
+            protocol=os.environ.get('SENSOR_PROTOCOL', 'text'), retention=TieredRetention()))
     
-    # Create placeholder elements
-    metric_placeholders = []
-    for i, metric in enumerate(metrics_config):
-        metric_placeholders.append(cols[i].empty())
+    # Metric cards are only redrawn when their displayed value or trend changes
+    metric_row = MetricRow()
+    grid = grid_options()
     
     # Create placeholder for charts
+    chart_range = "Live"
+    if manager is None:
+        # Whole shift reads the tiered buffer: raw recent frames, coarser further back
+        chart_range = st.radio("Chart range", ["Live", "Whole shift"], horizontal=True)
     chart_placeholder = st.empty()
     
+    # Serial-to-screen latency; SENSORS_LATENCY=latency.json exports it on each refresh
+    latency_path = os.environ.get('SENSORS_LATENCY')
+    with st.expander("⏱️ Sample latency"):
+        latency_summary = st.empty()
+        latency_chart = st.empty()
+    # SENSORS_PROFILE=1 turns on stage timers; =cprofile also profiles the first 100 passes
+    if 'timers' not in st.session_state:
+        profile_mode = os.environ.get('SENSORS_PROFILE', '')
+        st.session_state.timers = Instrumentation(enabled=bool(profile_mode))
+        if profile_mode == 'cprofile':
+            st.session_state.timers.start_profile(100)
+    timers = st.session_state.timers
+    if manager is None:
+        st.session_state.collector.timers = timers
+    with st.expander("🩺 Diagnostics"):
+        timers.enabled = st.checkbox("Stage timers", value=timers.enabled)
+        profile_col, memory_col = st.columns(2)
+        if profile_col.button("Profile next 100 passes"):
+            timers.start_profile(100)
+        if memory_col.button("Memory snapshot"):
+            st.code(timers.memory_snapshot())
+        diagnostics_table = st.empty()
+        profile_output = st.empty()
+    frames_drawn = 0
+    shown_alarm = None
+    shown_mark = None
+    shown_latency = None
+    
     try:
         while True:
-            # Read new data
-            st.session_state.collector.read_data()
+            # Read new data (the manager reads all devices on its own thread)
+            if manager is None:
+                collector = st.session_state.collector
+                with timers.stage('read_data'):
+                    # Drain a backlog (e.g. after a reconnect) instead of one line per pass
+                    collector.read_data(max_lines=50)
+                latest_values = collector.latest_values
+                with timers.stage('get_data_for_plots'):
+                    if chart_range == "Whole shift":
+                        plot_data = collector.get_retained_data()
+                    else:
+                        plot_data = collector.get_data_for_plots()
+            else:
+                collector = manager.collectors[selected_device]
+                with timers.stage('snapshot'):
+                    plot_data, latest_values = manager.snapshot(selected_device)
+            
+            status = connection_status(collector)
+            if status:
+                connection_placeholder.warning(status)
+            else:
+                connection_placeholder.empty()
+            
+            # Update metrics
+            with timers.stage('metrics'):
+                metric_row.update(latest_values, plot_data)
             
-            # Update metrics and check CO2 threshold
-            for i, metric in enumerate(metrics_config):
-                value = st.session_state.collector.latest_values[metric["key"]]
-                html = metric_html.format(
-                    label=metric["label"],
-                    value=f"{value:.1f}",
-                    unit=metric["unit"]
-                )
-                metric_placeholders[i].markdown(html, unsafe_allow_html=True)
-                
-                # Check CO2 threshold and show alarm if exceeded
-                co2_value = st.session_state.collector.latest_values['co2']
-                if co2_value > 725:
+            # Show the CO2 alarm; like the cards it is only redrawn when its text changes
+            co2_value = latest_values['co2']
+            alarm_text = f"{co2_value:.1f}" if co2_value > CO2_ALARM_PPM else None
+            if alarm_text != shown_alarm:
+                if alarm_text is None:
+                    alarm_placeholder.empty()
+                else:
                     alarm_html = """
                         <div class="alarm-box">
                             <span class="alarm-icon">⚠️</span>
-                            <div>WARNING: CO2 Level Exceeds 725 ppm! Current Value: {:.1f} ppm</div>
+                            <div>WARNING: CO2 Level Exceeds 725 ppm! Current Value: {} ppm</div>
                             <div class="alarm-prediction">⏰ Prediction: Pastries may develop mold within 7 hours if conditions persist</div>
                         </div>
-                    """.format(co2_value)
+                    """.format(alarm_text)
                     alarm_placeholder.markdown(alarm_html, unsafe_allow_html=True)
-                else:
-                    alarm_placeholder.empty()
+                shown_alarm = alarm_text
+            
+            # Update charts; with nothing new (e.g. while the port is down) the chart
+            # is kept, which also avoids Streamlit's duplicate element id error
+            if data_mark(plot_data) != shown_mark:
+                shown_mark = data_mark(plot_data)
+                chart_data = plot_data
+                if chart_range == "Live":
+                    # Each channel against its own arrival times, on one shared grid
+                    with timers.stage('align_channels'):
+                        if manager is None:
+                            series = collector.get_channel_series()
+                        else:
+                            series = manager.channel_series(selected_device)
+                        chart_data = align_channels(series, **grid)
+                with timers.stage('create_figures'):
+                    fig = create_figures(chart_data)
+                with timers.stage('plotly_chart'):
+                    chart_placeholder.plotly_chart(fig, use_container_width=True)
+                collector.latency.rendered()
+            timers.end_pass()
             
-            # Update charts
-            plot_data = st.session_state.collector.get_data_for_plots()
-            fig = create_figures(plot_data)
-            chart_placeholder.plotly_chart(fig, use_container_width=True)
+            # The histogram is secondary, so refresh it every 50 frames
+            frames_drawn += 1
+            if frames_drawn % 50 == 0:
+                summary = collector.latency.summary()
+                total, alarms = summary['stages']['total'], summary['alarms']
+                if total['count'] and collector.stats.readings != shown_latency:
+                    shown_latency = collector.stats.readings
+                    text = (f"End-to-end p50 {total['p50_ms']:.0f} ms · "
+                            f"p99 {total['p99_ms']:.0f} ms · max {total['max_ms']:.0f} ms")
+                    if alarms['count']:
+                        status = "met" if alarms['sla_met'] else "MISSED"
+                        text += (f" — alarms max {alarms['max_ms']:.0f} ms, "
+                                 f"SLA {alarms['sla_ms']:.0f} ms {status}")
+                    latency_summary.markdown(text)
+                    latency_chart.plotly_chart(collector.latency.histogram_figure(),
+                                               use_container_width=True)
+                if latency_path:
+                    collector.latency.export(latency_path)
+                if timers.enabled and timers.passes:
+                    import pandas as pd
+                    with diagnostics_table.container():
+                        st.dataframe(pd.DataFrame(timers.summary()).round(3), hide_index=True)
+                        counters = " · ".join(f"{name} {n:,}" for name, n in timers.counters.items())
+                        st.caption(f"{timers.passes:,} passes · {counters}")
+                        rates = collector.stats.rates()
+                        st.caption(" · ".join(f"{name} {rate:.2f}/s" for name, rate in rates.items()
+                                              if name != 'error_ratio')
+                                   + f" · error ratio {rates['error_ratio']:.2%}")
+                        if collector.decoder is not None:
+                            stats = collector.stats
+                            st.caption(f"Binary frames: {stats.dropped_frames:,} dropped · "
+                                       f"{stats.skipped_bytes:,} bytes skipped · "
+                                       f"{stats.errors['crc_error']:,} CRC errors · "
+                                       f"{stats.resync_misses:,} resync misses")
+                        if collector.stats.store_errors:
+                            failed = " · ".join(f"{name} {n:,}" for name, n
+                                                in collector.stats.store_errors.items())
+                            st.caption(f"History store errors: {failed} — last: "
+                                       f"{collector.stats.last_store_error}")
+                        if collector.stats.bad_lines:
+                            st.dataframe(pd.DataFrame(list(collector.stats.bad_lines),
+                                                      columns=['time', 'error', 'line']),
+                                         hide_index=True)
+                if timers.profile_report:
+                    profile_output.code(timers.profile_report)
             
             # Short sleep to prevent high CPU usage
             time.sleep(0.1)
             
     except Exception as e:
         st.error(f"An error occurred: {e}")
-    finally:
-        if 'collector' in st.session_state:
-            st.session_state.collector.close()
+        close_session_readers()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
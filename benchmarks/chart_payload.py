@@ -0,0 +1,168 @@
+"""Chart payload benchmark: typed-array figures against list-based ones.
+
+Builds the live dashboard chart (``sensors.create_figures``) and the
+history chart of ``Dashboard_Bakery/app.py`` for 1 Hz synthetic readings,
+once from plain lists / pandas columns as the dashboards used to and once
+with the typed arrays they send now, then serializes each figure the way
+Streamlit does (``plotly.io.to_json``)::
+
+    python benchmarks/chart_payload.py --sizes 10000,100000,1000000 --output payload.json
+
+Reports figure build time, serialization time and payload size (raw and
+gzipped, roughly what a compressing proxy would send).
+"""
+import argparse
+import gzip
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'arduino_python'), os.path.join(ROOT, 'Dashboard_Bakery')]
+
+from chart_arrays import epoch_ms, float32  # noqa: E402
+from sensors import create_figures  # noqa: E402
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+LIVE_TRACES = ((1, 'co2'), (2, 'temp_in'), (2, 'temp_out'), (3, 'hum_in'), (3, 'hum_out'))
+HISTORY_TRACES = ((1, 'Temperature_In'), (1, 'Temperature_Out'), (1, 'Humidity_In'),
+                  (1, 'Humidity_Out'), (2, 'CO2'))
+
+
+def synthetic_data(n, seed=0):
+    """``get_data_for_plots()``-style dict of ``n`` one-second readings"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 1)
+    data = {'timestamps': [start + timedelta(seconds=i) for i in range(n)]}
+    for name, level, step in (('co2', 400.0, 5.0), ('temp_in', 21.0, 0.1),
+                              ('temp_out', 18.0, 0.1), ('hum_in', 45.0, 0.5),
+                              ('hum_out', 60.0, 0.5)):
+        walk = level + np.cumsum(rng.uniform(-step, step, n))
+        data[name] = np.round(walk, 1).tolist()
+    return data
+
+
+def history_frame(data):
+    """The same readings as the history dashboard's DataFrame"""
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(data['timestamps']),
+        'Temperature_In': data['temp_in'],
+        'Temperature_Out': data['temp_out'],
+        'Humidity_In': data['hum_in'],
+        'Humidity_Out': data['hum_out'],
+        'CO2': data['co2'],
+    })
+
+
+def live_lists(data):
+    """``create_figures()`` traces as built before typed arrays"""
+    fig = make_subplots(rows=3, cols=1)
+    for row, name in LIVE_TRACES:
+        fig.add_trace(go.Scatter(x=data['timestamps'], y=data[name], name=name), row=row, col=1)
+    return fig
+
+
+def history_columns(df):
+    """app.py chart traces as built before typed arrays"""
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True)
+    for row, name in HISTORY_TRACES:
+        fig.add_trace(go.Scatter(x=df['timestamp'], y=df[name], name=name), row=row, col=1)
+    return fig
+
+
+def history_typed(df):
+    """app.py chart traces as built now"""
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True)
+    x = epoch_ms(df['timestamp'])
+    for row, name in HISTORY_TRACES:
+        fig.add_trace(go.Scatter(x=x, y=float32(df[name]), name=name), row=row, col=1)
+    fig.update_xaxes(type='date')
+    return fig
+
+
+# chart -> (input builder, {encoding: figure builder})
+CHARTS = {
+    'live': (lambda data: data, {'lists': live_lists, 'typed': create_figures}),
+    'history': (history_frame, {'lists': history_columns, 'typed': history_typed}),
+}
+
+
+def measure(chart, encoding, size, source, build, repeat):
+    build_s, json_s = [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fig = build(source)
+        t1 = time.perf_counter()
+        payload = pio.to_json(fig, validate=False)
+        t2 = time.perf_counter()
+        build_s.append(t1 - t0)
+        json_s.append(t2 - t1)
+    encoded = payload.encode('utf-8')
+    return {
+        'chart': chart,
+        'encoding': encoding,
+        'size': size,
+        'build_ms': statistics.median(build_s) * 1000,
+        'to_json_ms': statistics.median(json_s) * 1000,
+        'payload_bytes': len(encoded),
+        'gzip_bytes': len(gzip.compress(encoded, compresslevel=6)),
+    }
+
+
+def format_result(result):
+    return (f"{result['chart']:<8} {result['encoding']:<6} {result['size']:>10,}"
+            f"  build {result['build_ms']:>9.1f} ms  to_json {result['to_json_ms']:>9.1f} ms"
+            f"  payload {result['payload_bytes'] / 1024:>10,.0f} KiB"
+            f"  gzip {result['gzip_bytes'] / 1024:>9,.0f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare typed-array and list chart payloads')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated point counts per trace')
+    parser.add_argument('--charts', default=','.join(CHARTS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='chart_payload.json')
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(',')):
+        data = synthetic_data(size)
+        for chart in args.charts.split(','):
+            prepare, builders = CHARTS[chart]
+            source = prepare(data)
+            measured = {}
+            for encoding, build in builders.items():
+                measured[encoding] = measure(chart, encoding, size, source, build, args.repeat)
+                results.append(measured[encoding])
+                print(format_result(measured[encoding]), flush=True)
+            before, after = measured['lists'], measured['typed']
+            print(f"{'':<8} typed is {before['payload_bytes'] / after['payload_bytes']:.1f}x "
+                  f"smaller, serializes {before['to_json_ms'] / after['to_json_ms']:.1f}x faster",
+                  flush=True)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'plotly': plotly.__version__,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Cold-start benchmark: module import time and time to the first reading.
+
+Each measurement runs in a fresh interpreter, so nothing is cached in
+``sys.modules``::
+
+    python benchmarks/cold_start.py --runs 10 --output cold_start.json
+
+``first_reading`` spawns the headless collector (``collector.py``) against
+a replay pty and times it from process start until it has stored one
+reading and exited.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, 'arduino_python')
+sys.path.insert(0, APP_DIR)
+
+from replay import SerialReplay, load_data_txt  # noqa: E402
+
+MODULES = ('collector', 'sensors', 'sensors_charts', 'sensor_dashboard')
+IMPORT_SNIPPET = ('import time; t = time.perf_counter(); import {module}; '
+                  'print(time.perf_counter() - t)')
+
+
+def import_seconds(module):
+    """Seconds to import ``module`` in a fresh interpreter"""
+    out = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET.format(module=module)],
+                         cwd=APP_DIR, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def first_reading_seconds():
+    """Seconds from spawning the headless collector to its first stored reading"""
+    lines = [line for _, line in load_data_txt(os.path.join(ROOT, 'Dashboard_Bakery', 'Data.txt'))]
+    replay = SerialReplay([(0.0, line) for line in lines], speed=None, loop=True).start()
+    try:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, 'collector.py', '--port', replay.port, '--count', '1',
+                        '--quiet'], cwd=APP_DIR, check=True, timeout=60)
+        return time.perf_counter() - started
+    finally:
+        replay.close()
+
+
+def measure(name, call, runs):
+    samples = [call() for _ in range(runs)]
+    result = {
+        'name': name,
+        'runs': runs,
+        'median_ms': statistics.median(samples) * 1000,
+        'min_ms': min(samples) * 1000,
+        'max_ms': max(samples) * 1000,
+    }
+    print(f"{name:<28} median {result['median_ms']:>9.1f} ms  "
+          f"min {result['min_ms']:>9.1f} ms  max {result['max_ms']:>9.1f} ms", flush=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure collector and dashboard cold start')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--modules', default=','.join(MODULES))
+    parser.add_argument('--output', default='cold_start.json')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='fail if a median grew beyond tolerance over this earlier result file')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = [measure(f'import {module}', lambda module=module: import_seconds(module), args.runs)
+               for module in args.modules.split(',')]
+    results.append(measure('first_reading', first_reading_seconds, args.runs))
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {r['name']: r for r in json.load(f)['results']}
+        regressions = [r for r in results if r['name'] in baseline
+                       and r['median_ms'] > baseline[r['name']]['median_ms'] * (1 + args.tolerance)]
+        for result in regressions:
+            print(f"REGRESSION {result['name']}: {result['median_ms']:.1f} ms vs "
+                  f"{baseline[result['name']]['median_ms']:.1f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""Throughput, latency and memory benchmarks for the sensor data path.
+
+Runs each stage of the live and history pipelines on synthetic lines, on
+the replayed Data.txt capture and on noisy lines with injected faults, at
+increasing sizes, and writes the results as JSON::
+
+    python benchmarks/pipeline.py --sizes 100,10000,1000000 --output bench.json
+    python benchmarks/pipeline.py --compare bench.json   # exit 1 on regression
+
+Per-line stages (``parse_line``, ``read_data``) report per-call latency;
+whole-buffer stages report the latency of each repeated call. Peak memory
+comes from a separate ``tracemalloc`` pass so it does not skew the timings.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'arduino_python'), os.path.join(ROOT, 'Dashboard_Bakery')]
+
+from loaders import process_environmental_data  # noqa: E402
+from replay import FaultInjector, SerialReplay, format_co2, format_env, load_data_txt  # noqa: E402
+from collector import SensorDataCollector, classify_line  # noqa: E402
+from sensors import create_figures  # noqa: E402
+
+DATA_TXT = os.path.join(ROOT, 'Dashboard_Bakery', 'Data.txt')
+DEFAULT_SIZES = (100, 10_000, 1_000_000, 10_000_000)
+
+# Largest size worth running per stage; beyond it a run takes minutes
+STAGE_LIMITS = {
+    'parse_line': 10_000_000,
+    'read_data': 100_000,
+    'get_data_for_plots': 1_000_000,
+    'create_figures': 100_000,
+    'process_environmental_data': 1_000_000,
+}
+
+
+def synthetic_lines(n, seed=0):
+    """``n`` firmware lines from a random walk, in frame order"""
+    rng = random.Random(seed)
+    hum_out, temp_out, hum_in, temp_in, co2 = 60.0, 18.0, 45.0, 21.0, 400.0
+    lines = []
+    while len(lines) < n:
+        hum_out += rng.uniform(-0.5, 0.5)
+        temp_out += rng.uniform(-0.1, 0.1)
+        hum_in += rng.uniform(-0.5, 0.5)
+        temp_in += rng.uniform(-0.1, 0.1)
+        co2 = max(300.0, co2 + rng.uniform(-5, 5))
+        lines += [format_env('OUT', hum_out, temp_out), format_env('IN', hum_in, temp_in),
+                  format_co2(co2)]
+    return lines[:n]
+
+
+def replayed_lines(n):
+    """``n`` lines of the Data.txt capture, repeated as needed"""
+    capture = [line for _, line in load_data_txt(DATA_TXT)]
+    return (capture * (n // len(capture) + 1))[:n]
+
+
+def noisy_lines(n):
+    """Synthetic lines with truncations and nan readings, as from a flaky link"""
+    faults = FaultInjector(truncate=0.05, nan=0.05, seed=0)
+    return [line for _, line in faults.apply((0.0, line) for line in synthetic_lines(n))]
+
+
+def filled_collector(lines):
+    collector = SensorDataCollector(port=None, max_points=len(lines))
+    start = datetime(2025, 1, 1)
+    for i, line in enumerate(lines):
+        collector.handle_line(line, start + timedelta(seconds=i // 3))
+    return collector
+
+
+def summarize(latencies_ns):
+    latencies = np.asarray(latencies_ns, dtype=np.float64) / 1000.0
+    return {'p50_us': float(np.percentile(latencies, 50)),
+            'p99_us': float(np.percentile(latencies, 99))}
+
+
+def bench_parse_line(lines, repeat):
+    latencies = np.empty(len(lines), dtype=np.int64)
+    clock = time.perf_counter_ns
+    started = clock()
+    for i, line in enumerate(lines):
+        t0 = clock()
+        classify_line(line)
+        latencies[i] = clock() - t0
+    return clock() - started, len(lines), latencies
+
+
+def bench_read_data(lines, repeat):
+    replay = SerialReplay([(0.0, line) for line in lines], speed=None)
+    collector = SensorDataCollector(port=replay.port, max_points=len(lines))
+    latencies = []
+    clock = time.perf_counter_ns
+    replay.start()
+    started = clock()
+    while replay._thread.is_alive() or collector.serial_port.in_waiting:
+        t0 = clock()
+        if collector.read_data():
+            latencies.append(clock() - t0)
+    elapsed = clock() - started
+    collector.close()
+    replay.close()
+    return elapsed, replay.lines_sent, latencies
+
+
+def _repeated(call, items, repeat):
+    latencies = []
+    clock = time.perf_counter_ns
+    for _ in range(repeat):
+        t0 = clock()
+        call()
+        latencies.append(clock() - t0)
+    return sum(latencies), items * repeat, latencies
+
+
+def bench_get_data_for_plots(lines, repeat):
+    collector = filled_collector(lines)
+    return _repeated(collector.get_data_for_plots, len(lines), repeat)
+
+
+def bench_create_figures(lines, repeat):
+    data = filled_collector(lines).get_data_for_plots()
+    return _repeated(lambda: create_figures(data), len(lines), repeat)
+
+
+def bench_process_environmental_data(lines, repeat):
+    text = '\r\n'.join(lines) + '\r\n'
+    return _repeated(lambda: process_environmental_data(text), len(lines), repeat)
+
+
+STAGES = {
+    'parse_line': bench_parse_line,
+    'read_data': bench_read_data,
+    'get_data_for_plots': bench_get_data_for_plots,
+    'create_figures': bench_create_figures,
+    'process_environmental_data': bench_process_environmental_data,
+}
+SOURCES = {'synthetic': synthetic_lines, 'replay': replayed_lines, 'noisy': noisy_lines}
+
+
+def peak_memory(stage, lines):
+    tracemalloc.start()
+    try:
+        STAGES[stage](lines, 1)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(stages, sources, sizes, repeat=5, memory=True):
+    results = []
+    for source in sources:
+        for size in sizes:
+            lines = SOURCES[source](size)
+            for stage in stages:
+                result = {'stage': stage, 'source': source, 'size': size}
+                if size > STAGE_LIMITS[stage]:
+                    result['skipped'] = f'above limit of {STAGE_LIMITS[stage]}'
+                    results.append(result)
+                    continue
+                elapsed_ns, items, latencies = STAGES[stage](lines, repeat)
+                result['seconds'] = elapsed_ns / 1e9
+                result['items_per_second'] = items / (elapsed_ns / 1e9) if elapsed_ns else None
+                result.update(summarize(latencies))
+                if stage == 'parse_line':
+                    errors = sum(classify_line(line)[1] is not None for line in lines)
+                    result['error_ratio'] = errors / len(lines)
+                if memory:
+                    result['peak_kib'] = peak_memory(stage, lines) / 1024
+                results.append(result)
+                print(format_result(result), flush=True)
+    return results
+
+
+def format_result(result):
+    label = f"{result['stage']:<28} {result['source']:<10} {result['size']:>10,}"
+    if 'skipped' in result:
+        return f'{label}  skipped ({result["skipped"]})'
+    memory = f"  peak {result['peak_kib']:>10,.0f} KiB" if 'peak_kib' in result else ''
+    errors = f"  errors {result['error_ratio']:.1%}" if 'error_ratio' in result else ''
+    return (f"{label}  {result['items_per_second']:>14,.0f}/s"
+            f"  p50 {result['p50_us']:>10,.1f} us  p99 {result['p99_us']:>10,.1f} us{memory}{errors}")
+
+
+def compare(results, baseline_path, tolerance):
+    """Return the results whose throughput fell more than ``tolerance`` below the baseline"""
+    with open(baseline_path) as f:
+        baseline = {(r['stage'], r['source'], r['size']): r for r in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        previous = baseline.get((result['stage'], result['source'], result['size']))
+        if not previous or 'items_per_second' not in previous or 'items_per_second' not in result:
+            continue
+        if result['items_per_second'] < previous['items_per_second'] * (1 - tolerance):
+            regressions.append((result, previous))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sensor data pipeline')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated sample counts')
+    parser.add_argument('--stages', default=','.join(STAGES))
+    parser.add_argument('--sources', default=','.join(SOURCES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='fail if throughput drops below this earlier result file')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = run(args.stages.split(','), args.sources.split(','), sizes, args.repeat,
+                  memory=not args.no_memory)
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Wrote {args.output}')
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for result, previous in regressions:
+            print(f"REGRESSION {result['stage']} {result['source']} {result['size']}: "
+                  f"{result['items_per_second']:,.0f}/s vs {previous['items_per_second']:,.0f}/s")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()